@@ -1,16 +1,26 @@
 import os
+import math
 import time
-import pandas as pd
-import json
-from flask import Flask, render_template, redirect, url_for, send_file
-import h5py
+import functools
+from flask import Flask, render_template, url_for, jsonify, request, make_response, g, Response
  
 # --- TEMPO'ya Özel Yeni Modüller ---
-from modules.tempo_reader import extract_tempo_data
-from modules.aqi_calculator import calculate_aqi_score,calculate_aqi
-from modules.map_generator import generate_map
-from modules.chart_generator import generate_chart_json
-from modules.generate_action import generate_action_json
+from modules.storage import table_path
+from modules.jobs import JobRunner
+from modules.manifest import Manifest
+from modules.view_cache import ViewCache
+from modules.payloads import Payload
+from modules import metrics
+from modules.lazy import lazy_import
+
+# Ağır modüller (pandas/numpy/h5py/folium) tembel yüklenir: '/', '/data_sources', '/aqi_map' gibi
+# şablon rotaları bunları hiç yüklemez, hesaplama rotaları ilk çağrıldığında bir kez yükler
+tempo_reader = lazy_import('modules.tempo_reader')
+pipeline_module = lazy_import('modules.pipeline')
+chart_generator = lazy_import('modules.chart_generator')
+grid_tiles = lazy_import('modules.grid_tiles')
+spatial_index = lazy_import('modules.spatial_index')
+granule_fetcher = lazy_import('modules.granule_fetcher')
 
 
 app = Flask(__name__)
@@ -21,15 +31,68 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # NOT: Artık tek bir örnek HDF5 dosyası kullanılmayacak, veri canlı çekilecek.
 # DATA_PATH = os.path.join(BASE_DIR, 'data', 'gpm_sample.HDF5') # Bu satır silindi.
 
-CSV_PATH = os.path.join(BASE_DIR, 'data', 'tempo_no2.csv') # NO2 verisi (Lat/Lon/NO2_column)
-RISK_PATH = os.path.join(BASE_DIR, 'data', 'tempo_aqi_risk.csv') # AQI skorları
-MAP_PATH = os.path.join(BASE_DIR, 'visuals', 'aqi_map.html') # Yeni Harita
+# Ara tablolar: format STORMSENTINEL_TABLE_FORMAT ile seçilir (csv | parquet | feather | npy)
+CSV_PATH = table_path(os.path.join(BASE_DIR, 'data', 'tempo_no2.csv')) # NO2 verisi (Lat/Lon/NO2_column)
+RISK_PATH = table_path(os.path.join(BASE_DIR, 'data', 'tempo_aqi_risk.csv')) # AQI skorları
+GRID_DIR = os.path.join(BASE_DIR, 'data', 'aqi_grid') # Harita için çok çözünürlüklü hücre piramidi
 JSON_PATH = os.path.join(BASE_DIR, 'static', 'aqi_chart_data.json') # Grafik Verisi
 JSON_PATH_ACTION = os.path.join(BASE_DIR, 'static', 'aqi_action.json') # Karar Destek Verisi
 PDF_PATH = os.path.join(BASE_DIR, 'static', 'aqi_report.pdf') # Yeni PDF Yolu
-CHARTH_PATH=os.path.join(BASE_DIR, 'visuals', 'charth.html') # Yeni Harita
 # --- Yeni Dosya Yolları ---
 NC_PATH = os.path.join(BASE_DIR, 'data', 'temp.nc') 
+# Canlı granül: tanımlıysa her güncellemede önbellekli indiriciyle alınır (EARTHDATA_TOKEN ile yetkilendirme)
+GRANULE_URL = os.environ.get('STORMSENTINEL_GRANULE_URL')
+MANIFEST_PATH = os.path.join(BASE_DIR, 'data', 'pipeline_manifest.json') # Girdi hash'leri / üretilen çıktılar
+TIMESERIES_DIR = os.path.join(BASE_DIR, 'data', 'timeseries') # Granül bazlı zon/hücre AQI geçmişi
+
+# --- Arka Plan İşleri ---
+# /update_data, veri akışını arka planda çalıştırır; aynı veri seti için tek iş çalışır.
+# Çok işçili sunucuda (gunicorn) iş kayıtları ve veri seti kilidi JOBS_DIR'de paylaşılır: akışı tek işçi çalıştırır
+UPDATE_DATASET = 'tempo_aqi'
+JOBS_DIR = os.path.join(BASE_DIR, 'data', 'jobs')
+jobs = JobRunner(state_dir=JOBS_DIR)
+
+@functools.cache
+def grid_store():
+    return grid_tiles.GridStore(GRID_DIR)
+
+@functools.cache
+def pixel_index():
+    return spatial_index.PixelIndexStore(RISK_PATH)
+
+# Panel rotalarının türetilmiş değerleri; veri akışı yeni çıktı yayımlayınca temizlenir
+view_cache = ViewCache()
+
+def parse_bbox(default='-180,-90,180,90'):
+    """?bbox=batı,güney,doğu,kuzey parametresini ayrıştırır; geçersizse ValueError fırlatır."""
+    bbox = [float(v) for v in request.args.get('bbox', default).split(',')]
+    if len(bbox) != 4 or not all(math.isfinite(v) for v in bbox):
+        raise ValueError("bbox dört sonlu değer içermeli")
+    west, south, east, north = bbox
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= 90 and -90 <= north <= 90):
+        raise ValueError("bbox enlemleri [-90, 90], boylamları [-180, 180] aralığında olmalı")
+    return bbox
+
+# --- Ölçümler (STORMSENTINEL_METRICS=1 ile açılır) ---
+@app.before_request
+def start_request_timer():
+    if metrics.ENABLED:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    if metrics.ENABLED and 'request_start' in g:
+        # Etiket olarak URL kalıbı kullanılır (/update_status/<job_id>), kardinalite sınırlı kalır
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe('http_request_seconds', time.perf_counter() - g.request_start,
+                        route=route, method=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.ENABLED:
+        return "Ölçümler kapalı (STORMSENTINEL_METRICS=1 ile açın).", 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # GPM/MODIS ile ilgili tüm eski rotalar (run_all, modis_panel, combined_panel) kaldırıldı.
 @app.route('/')
@@ -41,9 +104,8 @@ def index():
 def aqi_panel():
     # Veri başarıyla işlendiyse, ortalama risk skorunu alıp panele gönderelim.
     try:
-        df = pd.read_csv(RISK_PATH)
-        # Bütün zonların ortalama AQI risk skoru
-        avg_aqi = df['risk_score'].mean().round(0)
+        # Bütün piksellerin ortalama AQI risk skoru: bellekteki karar destek yükünden (zon skoru × piksel sayısı)
+        avg_aqi = view_cache.get('avg_aqi', average_risk_score, JSON_PATH_ACTION)
     except:
         avg_aqi = "N/A" # Veri henüz çekilmediyse
 
@@ -57,54 +119,190 @@ def aqi_map_graph_panel():
 # Harita ve Grafik dosyaları (Yollar güncellendi)
 @app.route('/aqi_map')
 def aqi_map():
-    return send_file(MAP_PATH) if os.path.exists(MAP_PATH) else "❌ Harita dosyası bulunamadı. Veri güncellemeyi deneyin."
+    # Leaflet haritası, görünen alanın hücrelerini /aqi_grid'den çeker.
+    # Sayfa veriden bağımsızdır: bir kez render edilir, ETag/Last-Modified ile 304 döndürülebilir.
+    template_path = os.path.join(app.root_path, app.template_folder, 'aqi_map.html')
+    html = view_cache.get('aqi_map_html', lambda: render_template('aqi_map.html'), template_path)
+    response = make_response(html)
+    response.add_etag()
+    response.last_modified = os.path.getmtime(template_path)
+    return response.make_conditional(request)
+
+@app.route('/aqi_grid')
+def aqi_grid():
+    # ?bbox=batı,güney,doğu,kuzey&zoom=z → GeoJSON hücreleri (seviye başına sınırlı sayıda)
+    try:
+        bbox = parse_bbox()
+        zoom = int(request.args.get('zoom', 4))
+    except ValueError as e:
+        return jsonify(error=f"Geçersiz sorgu: {e}"), 400
+
+    collection = grid_store().query(bbox, zoom)
+    if collection is None:
+        return jsonify(error="Hücre verisi bulunamadı. Veri güncellemeyi deneyin."), 404
+    return jsonify(collection)
+
+@app.route('/aqi_trend')
+def aqi_trend():
+    # ?start=..&end=..&resolution=raw|hourly|daily → zon bazlı AQI trendi (zaman serisi deposundan)
+    try:
+        data = chart_generator.build_trend_data(TIMESERIES_DIR, start=request.args.get('start'), end=request.args.get('end'),
+                                resolution=request.args.get('resolution', 'hourly'))
+    except ValueError as e:
+        return jsonify(error=f"Geçersiz sorgu: {e}"), 400
+    return jsonify(data)
+
+@app.route('/aqi_point')
+def aqi_point():
+    # ?lat=..&lon=.. → en yakın TEMPO pikselinin AQI değeri
+    try:
+        lat, lon = float(request.args['lat']), float(request.args['lon'])
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            raise ValueError("lat/lon sonlu olmalı")
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("lat [-90, 90], lon [-180, 180] aralığında olmalı")
+    except (KeyError, ValueError) as e:
+        return jsonify(error=f"Geçersiz sorgu: {e}"), 400
+
+    index = pixel_index().get()
+    if index is None:
+        return jsonify(error="Risk verisi bulunamadı. Veri güncellemeyi deneyin."), 404
+    pixel = index.nearest(lat, lon)
+    if pixel is None:
+        return jsonify(error="Yakında TEMPO pikseli yok."), 404
+    return jsonify(pixel)
+
+@app.route('/aqi_bbox_stats')
+def aqi_bbox_stats():
+    # ?bbox=batı,güney,doğu,kuzey → piksel sayısı ve aqi / NO2_column için ortalama, en yüksek, yüzdelikler
+    try:
+        bbox = parse_bbox()
+    except ValueError as e:
+        return jsonify(error=f"Geçersiz sorgu: {e}"), 400
+
+    index = pixel_index().get()
+    if index is None:
+        return jsonify(error="Risk verisi bulunamadı. Veri güncellemeyi deneyin."), 404
+    return jsonify(bbox=bbox, **index.bbox_stats(*bbox))
 
 @app.route('/aqi_chart')
 def aqi_chart():
-    return send_file(CHARTH_PATH) if os.path.exists(CHARTH_PATH) else "❌ Grafik dosyası bulunamadı. Veri güncellemeyi deneyin."
+    # Chart.js sayfası veriyi /aqi_chart_data'dan çeker; sayfa veriden bağımsızdır (ETag/Last-Modified ile 304)
+    template_path = os.path.join(app.root_path, app.template_folder, 'chart.html')
+    html = view_cache.get('aqi_chart_html', lambda: render_template('chart.html'), template_path)
+    response = make_response(html)
+    response.add_etag()
+    response.last_modified = os.path.getmtime(template_path)
+    return response.make_conditional(request)
+
+# Grafik / karar destek JSON yükleri: bellekte (ham + gzip) tutulur, dosya yalnızca yayımlandığında okunur
+def load_payload(key, path):
+    return view_cache.get(key, lambda: Payload.from_file(path), path)
+
+def average_risk_score():
+    zones = load_payload('action_payload', JSON_PATH_ACTION).data()['zones']
+    # Eski yüklerde piksel sayısı yoksa zonlar eşit ağırlıklı
+    weights = [zone.get('pixels', 1) for zone in zones]
+    return round(sum(zone['risk_score'] * w for zone, w in zip(zones, weights)) / sum(weights))
+
+def send_payload(key, path):
+    if not os.path.exists(path):
+        return jsonify(error="Veri bulunamadı. Veri güncellemeyi deneyin."), 404
+    payload = load_payload(key, path)
+    use_gzip = payload.gzip is not None and request.accept_encodings['gzip'] > 0
+    response = make_response(payload.gzip if use_gzip else payload.body)
+    response.mimetype = 'application/json'
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    # Sıkıştırılmış ve ham gövde farklı temsillerdir: ETag'ler de farklı olmalı
+    response.set_etag(payload.etag + ('-gz' if use_gzip else ''))
+    response.last_modified = payload.mtime
+    return response.make_conditional(request)
+
+@app.route('/aqi_chart_data')
+def aqi_chart_data():
+    return send_payload('chart_payload', JSON_PATH)
+
+@app.route('/aqi_action_data')
+def aqi_action_data():
+    return send_payload('action_payload', JSON_PATH_ACTION)
 
 # Karar Destek Rotası (Yol güncellendi)
 @app.route('/decision_support')
 def decision_support():
     try:
-        with open(JSON_PATH_ACTION, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        zones = data.get("zones", [])
+        # /aqi_action_data ile aynı bellek içi yük (dosya yalnızca yayımlandığında okunur)
+        zones = load_payload('action_payload', JSON_PATH_ACTION).data().get("zones", []) \
+            if os.path.exists(JSON_PATH_ACTION) else []
         return render_template('decision_support.html', zones=zones)
     except Exception as e:
         return f"<h4>❌ Karar destek verisi yüklenemedi: {str(e)}</h4>"
 
-@app.route('/update_data')
-def update_data():
+def run_update_pipeline(on_stage=None, force=False):
+    """TEMPO → AQI → harita/grafik/karar destek akışı (arka plan işinde çalışır, hata durumunda exception fırlatır)."""
     start = time.time()
-    try:
-        print("🚀 TEMPO AQI veri akışı başlatıldı...")
+    print("🚀 TEMPO AQI veri akışı başlatıldı...")
 
-        # 1. TEMPO verisini çek ve CSV'ye yaz
-     #  tempo_csv = extract_tempo_data(hdf_path=NC_PATH, output_csv=CSV_PATH)
-      #  if not tempo_csv:
-      #      return "<h4>❌ TEMPO veri çekme/işleme başarısız. Dosya yapısını veya earthaccess girişini kontrol edin.</h4>"
+    # 1. TEMPO verisini çek ve CSV'ye yaz (granül önbellekteyse ağa gidilmez)
+    nc_path = NC_PATH
+    if GRANULE_URL:
+        if on_stage:
+            on_stage('fetch')
+        nc_path = granule_fetcher.fetch_granules([GRANULE_URL])[0]
+        if not nc_path:
+            raise RuntimeError("TEMPO veri çekme başarısız. Granül URL'sini veya EARTHDATA_TOKEN'ı kontrol edin.")
+        # Granül içeriği (sha256) değişmediyse ve NO2 tablosu duruyorsa çıkarma atlanır
+        manifest = Manifest(MANIFEST_PATH)
+        digest = granule_fetcher.GranuleCache.object_digest(nc_path)
+        if not force and manifest.is_fresh('extract', digest, CSV_PATH):
+            print("♻️ Granül değişmedi, NO2 tablosu güncel; çıkarma atlandı.")
+        else:
+            if on_stage:
+                on_stage('extract')
+            if not tempo_reader.extract_tempo_data(hdf_path=nc_path, output_csv=CSV_PATH):
+                raise RuntimeError("TEMPO veri işleme başarısız. Granül içeriğini kontrol edin.")
+            manifest.record('extract', digest, CSV_PATH)
+            manifest.save()
 
-        # 2. AQI skorlarını hesapla
-        risk_csv = calculate_aqi(csv_path=CSV_PATH, output_csv=RISK_PATH)
-        if not risk_csv:
-            return "<h4>❌ AQI hesaplama başarısız. Veri formatını veya eşik değerlerini kontrol edin.</h4>"
+    # 2. AQI skorlarını hesapla, 3. görsel ve karar destek dosyalarını oluştur
+    # (NO2 tablosu bir kez okunur, risk tablosu bellekte üreticilere aktarılır;
+    #  RISK_PATH yalnızca /aqi_panel ve /debug için yazılır)
+    # Zaman serisi anahtarı: granülün zaman damgası (granül yoksa NO2 tablosunun mtime'ı)
+    timestamp = tempo_reader.granule_timestamp(nc_path if os.path.exists(nc_path) else CSV_PATH) if os.path.exists(CSV_PATH) else None
+    pipeline = pipeline_module.TempoPipeline(csv_path=CSV_PATH, grid_dir=GRID_DIR, chart_json=JSON_PATH,
+                             action_json=JSON_PATH_ACTION, risk_path=RISK_PATH, on_stage=on_stage,
+                             manifest_path=MANIFEST_PATH, force=force,
+                             timeseries_dir=TIMESERIES_DIR, timestamp=timestamp)
+    if not pipeline.run():
+        raise RuntimeError("AQI hesaplama başarısız. Veri formatını veya eşik değerlerini kontrol edin.")
+    # Yeni çıktılar yayımlandı: panel önbelleğini temizle (diğer işçiler dosya mtime'ı değişince yeniler)
+    view_cache.invalidate()
 
-        # 3. Görsel ve karar destek dosyalarını oluştur
-        generate_map(csv_path=RISK_PATH, output_html=MAP_PATH)
-        generate_chart_json(csv_path=RISK_PATH, output_json=JSON_PATH)
-        generate_action_json(csv_path=RISK_PATH, output_json=JSON_PATH_ACTION)
+    # (İsteğe bağlı) PDF raporu oluştur
+    # generate_pdf_report(RISK_PATH, output_path=PDF_PATH)
 
-        # (İsteğe bağlı) PDF raporu oluştur
-        # generate_pdf_report(RISK_PATH, output_path=PDF_PATH)
+    duration = round(time.time() - start, 2)
+    print(f"✅ TEMPO AQI veri akışı tamamlandı ({duration} saniye).")
+    return {'duration': duration, 'timings': pipeline.timings, 'skipped': pipeline.skipped}
 
-        duration = round(time.time() - start, 2)
-        print(f"✅ TEMPO AQI veri akışı tamamlandı ({duration} saniye).")
-        return redirect(url_for('aqi_panel'))
+@app.route('/update_data')
+def update_data():
+    # İşi başlatır (veya çalışan işe bağlanır) ve hemen döner; durum /update_status/<id> ile izlenir
+    # Girdi değişmediyse aşamalar atlanır; ?force=1 tüm çıktıları yeniden üretir
+    force = request.args.get('force') == '1'
+    job, attached = jobs.submit(UPDATE_DATASET, lambda on_stage: run_update_pipeline(on_stage, force=force))
+    status_url = url_for('update_status', job_id=job['id'])
+    response = jsonify(job=job, attached=attached, status_url=status_url)
+    response.headers['Location'] = status_url
+    return response, 202
 
-    except Exception as e:
-        print(f"❌ Güncelleme hatası: {e}")
-        return f"<h4>❌ Güncelleme sırasında hata oluştu:<br>{str(e)}</h4>"
+@app.route('/update_status/<job_id>')
+def update_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify(error="İş bulunamadı."), 404
+    return jsonify(job=job)
 # Diğer rotaları (data_sources, debug_paths) koruyoruz
 @app.route('/data_sources')
 def data_sources():
@@ -115,15 +313,37 @@ def debug_paths():
     return f"""
     📁 CSV_PATH: {CSV_PATH} → {os.path.exists(CSV_PATH)}<br>
     📁 RISK_PATH: {RISK_PATH} → {os.path.exists(RISK_PATH)}<br>
-    📁 MAP_PATH: {MAP_PATH} → {os.path.exists(MAP_PATH)}<br>
+    📁 GRID_DIR: {GRID_DIR} → {os.path.exists(GRID_DIR)}<br>
     📁 CHART_PATH: {JSON_PATH} → {os.path.exists(JSON_PATH)}<br>
     📁 ACTION_PATH: {JSON_PATH_ACTION} → {os.path.exists(JSON_PATH_ACTION)}<br>
     """
 
+def serve():
+    """
+    Doğrudan çalıştırma: STORMSENTINEL_SERVER=waitress (varsayılan, kuruluysa) veya flask (threaded).
+    Çok işçili üretim kurulumu: gunicorn -c gunicorn.conf.py app:app (bkz. gunicorn.conf.py).
+    STORMSENTINEL_DEBUG=1 ile Flask hata ayıklayıcısı açılır (yalnızca geliştirme).
+    """
+    host = os.environ.get('STORMSENTINEL_HOST', '127.0.0.1')
+    port = int(os.environ.get('STORMSENTINEL_PORT', '5000'))
+    if os.environ.get('STORMSENTINEL_DEBUG') == '1':
+        app.run(host=host, port=port, debug=True, use_reloader=False)
+        return
+    if os.environ.get('STORMSENTINEL_SERVER', 'waitress') == 'waitress':
+        try:
+            from waitress import serve as waitress_serve
+            threads = int(os.environ.get('STORMSENTINEL_THREADS', '8'))
+            print(f"🚀 waitress ({threads} iş parçacığı) → http://{host}:{port}")
+            waitress_serve(app, host=host, port=port, threads=threads)
+            return
+        except ImportError:
+            print("⚠️ waitress kurulu değil, Flask sunucusu kullanılıyor. Üretim için: gunicorn -c gunicorn.conf.py app:app")
+    app.run(host=host, port=port, threaded=True)
+
 if __name__ == '__main__':
     # Flask ayarları: 'modules' klasörünün varlığını kontrol edin ve yoksa oluşturun.
     os.makedirs(os.path.join(BASE_DIR, 'data'), exist_ok=True)
     os.makedirs(os.path.join(BASE_DIR, 'visuals'), exist_ok=True)
     os.makedirs(os.path.join(BASE_DIR, 'static'), exist_ok=True)
-    
-    app.run(debug=True, use_reloader=False)
\ No newline at end of file
+
+    serve()
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Skaler (Series.apply / satır bazlı apply) ve vektörel AQI motorunu karşılaştırır.
+
+Kullanım:
+    python benchmarks/bench_aqi.py                 # 10^5, 10^6, 10^7 satır
+    python benchmarks/bench_aqi.py --sizes 100000 --scalar-limit 100000
+
+Skaler yol 10^7 satırda dakikalar sürer; --scalar-limit üzerindeki boyutlarda
+skaler süre, limit büyüklüğündeki bir örnek üzerinden doğrusal olarak tahmin edilir.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.aqi_calculator import (  # noqa: E402
+    calculate_aqi_score, define_us_region, risk_level,
+    calculate_aqi_scores, define_us_regions, risk_levels,
+)
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'latitude': rng.uniform(5, 60, n),
+        'longitude': rng.uniform(-135, -35, n),
+        'NO2_column': rng.uniform(-1e15, 2.5e17, n),
+    })
+
+
+def run_scalar(df):
+    aqi = df['NO2_column'].apply(calculate_aqi_score)
+    zone = df.apply(lambda row: define_us_region(row['latitude'], row['longitude']), axis=1)
+    level = aqi.apply(risk_level)
+    return aqi.to_numpy(), zone.to_numpy(), level.to_numpy()
+
+
+def run_vectorized(df):
+    aqi = calculate_aqi_scores(df['NO2_column'].to_numpy())
+    zone = define_us_regions(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    level = risk_levels(aqi)
+    return aqi, zone, level
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**5, 10**6, 10**7])
+    parser.add_argument('--scalar-limit', type=int, default=10**6)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'scalar_s':>10} {'vector_s':>10} {'speedup':>9}")
+    for n in args.sizes:
+        df = make_frame(n)
+        vec_t, vec = timed(run_vectorized, df)
+
+        sample = df if n <= args.scalar_limit else df.iloc[:args.scalar_limit]
+        scalar_t, ref = timed(run_scalar, sample)
+        m = len(sample)
+        for expected, got in zip(ref, vec):
+            if not np.array_equal(expected, got[:m]):
+                raise SystemExit(f"❌ Skaler ve vektörel sonuçlar farklı (n={n})")
+        estimated = '*' if m < n else ' '
+        scalar_t = scalar_t * n / m
+
+        print(f"{n:>10} {scalar_t:>9.2f}{estimated} {vec_t:>10.3f} {scalar_t / vec_t:>8.0f}x")
+    print("* = örnek üzerinden doğrusal tahmin")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Granül indiricinin (modules/granule_fetcher) yerel HTTP sunucusuna (granule_server.py) karşı ölçümü.
+
+Senaryolar:
+    sequential   — eşzamanlılık 1, soğuk önbellek
+    parallel     — eşzamanlılık --concurrency, soğuk önbellek
+    warm         — aynı URL'ler tekrar: ağa hiç istek gitmemeli
+    resume       — her dosyanın ilk aktarımı yarıda kesilir; Range ile kaldığı yerden sürdürülmeli
+    eviction     — önbellek sınırı granüllerin yarısı kadar: en eski nesneler silinmeli
+
+Kullanım:
+    python benchmarks/bench_fetch.py --granules 8 --size-mb 8 --rate 20000000 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from granule_server import serve_in_thread  # noqa: E402
+from modules.granule_fetcher import GranuleCache, GranuleFetcher, file_sha256  # noqa: E402
+
+
+def make_granules(root, count, size_bytes):
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, f'TEMPO_NO2_L3_V03_20240501T{i % 24:02d}0000Z_S{i:03d}.nc')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size_bytes))
+        paths.append(path)
+    return paths
+
+
+def run(server, urls, cache_dir, concurrency, max_bytes=None):
+    cache = GranuleCache(cache_dir, max_bytes if max_bytes is not None else 1 << 40)
+    fetcher = GranuleFetcher(cache, concurrency=concurrency)
+    before = dict(server.stats)
+    start = time.perf_counter()
+    try:
+        paths = asyncio.run(fetcher.fetch_many(urls))
+    finally:
+        fetcher.close()
+    seconds = time.perf_counter() - start
+    delta = {k: server.stats[k] - before[k] for k in server.stats}
+    return paths, seconds, delta, fetcher.pool.opened, cache
+
+
+def check(label, ok):
+    print(f"   {'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--granules', type=int, default=8)
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.05, help="Sunucu istek gecikmesi (sn)")
+    parser.add_argument('--rate', type=float, default=20e6, help="Bağlantı başına hız sınırı (bayt/sn)")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_fetch_')
+    src = os.path.join(work, 'src')
+    os.makedirs(src)
+    size = int(args.size_mb * 1e6)
+    files = make_granules(src, args.granules, size)
+    digests = {os.path.basename(p): file_sha256(p) for p in files}
+    ok = True
+
+    server, _ = serve_in_thread(src, latency=args.latency, rate=args.rate)
+    urls = [f'{server.url}/{os.path.basename(p)}' for p in files]
+    # Yarısı 302 yönlendirmesiyle (Earthdata → S3 benzeri)
+    urls = [u.replace(server.url, server.url + '/redirect') if i % 2 else u for i, u in enumerate(urls)]
+    total_mb = args.granules * size / 1e6
+    print(f"🛰️ {args.granules} granül × {args.size_mb} MB, gecikme {args.latency}s, hız {args.rate / 1e6:.0f} MB/sn/bağlantı")
+
+    try:
+        print(f"{'senaryo':>12} {'süre_s':>8} {'MB/sn':>8} {'istek':>6} {'bağlantı':>9}")
+        results = {}
+        for name, concurrency in (('sequential', 1), ('parallel', args.concurrency)):
+            cache_dir = os.path.join(work, f'cache_{name}')
+            paths, seconds, delta, opened, _ = run(server, urls, cache_dir, concurrency)
+            results[name] = seconds
+            print(f"{name:>12} {seconds:8.2f} {total_mb / seconds:8.1f} {delta['requests']:6d} {opened:9d}")
+            ok &= check("içerik hash'leri kaynakla aynı",
+                        all(p and os.path.basename(p) == digests[os.path.basename(u)] for p, u in zip(paths, urls)))
+            ok &= check(f"bağlantılar yeniden kullanıldı ({opened} bağlantı, {delta['requests']} istek)",
+                        opened <= concurrency)
+
+        paths, seconds, delta, opened, _ = run(server, urls, os.path.join(work, 'cache_parallel'), args.concurrency)
+        print(f"{'warm':>12} {seconds:8.2f} {'-':>8} {delta['requests']:6d} {opened:9d}")
+        ok &= check("önbellekten: ağa istek gitmedi", delta['requests'] == 0 and all(paths))
+        print(f"   ⏱️ paralel hızlanma: {results['sequential'] / results['parallel']:.1f}x")
+
+        server.shutdown()
+        server, _ = serve_in_thread(src, latency=args.latency, rate=args.rate, truncate_after=size // 3)
+        urls = [f'{server.url}/{os.path.basename(p)}' for p in files]
+        paths, seconds, delta, opened, _ = run(server, urls, os.path.join(work, 'cache_resume'), args.concurrency)
+        print(f"{'resume':>12} {seconds:8.2f} {total_mb / seconds:8.1f} {delta['requests']:6d} {opened:9d}")
+        ok &= check(f"kesilen aktarımlar Range ile sürdürüldü ({delta['range_requests']} Range isteği)",
+                    delta['range_requests'] == args.granules)
+        ok &= check(f"yeniden gönderilen bayt yok ({delta['bytes_sent'] / 1e6:.1f} MB gönderildi)",
+                    delta['bytes_sent'] == args.granules * size)
+        ok &= check("sürdürülen dosyalar bozulmadı",
+                    all(p and os.path.basename(p) == digests[os.path.basename(u)] for p, u in zip(paths, urls)))
+
+        limit = size * args.granules // 2
+        paths, seconds, delta, opened, cache = run(server, urls, os.path.join(work, 'cache_evict'), args.concurrency,
+                                                   max_bytes=limit)
+        kept = sum(1 for u in urls if cache.lookup(u))
+        print(f"{'eviction':>12} {seconds:8.2f} {total_mb / seconds:8.1f} {delta['requests']:6d} {opened:9d}")
+        ok &= check(f"önbellek sınır içinde ({cache.total_bytes() / 1e6:.1f} / {limit / 1e6:.1f} MB, {kept} granül)",
+                    cache.total_bytes() <= limit and kept == args.granules // 2)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
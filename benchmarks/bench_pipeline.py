@@ -0,0 +1,185 @@
+"""
+TEMPO → AQI → çıktılar veri akışının aşama bazlı benchmark'ı.
+
+Sentetik, TEMPO biçimli HDF5 granülleri (product/vertical_column_troposphere, latitude, longitude)
+birkaç ızgara boyutunda üretilir ve her aşama ayrı bir süreçte ölçülür:
+extract_tempo_data, calculate_aqi, generate_map, generate_grid, generate_chart_json, generate_action_json.
+Her aşama için duvar saati süresi, en yüksek RSS ve satır/sn makine tarafından okunabilir JSON'a yazılır.
+
+Kullanım:
+    python benchmarks/bench_pipeline.py --sizes 200x300 800x1200 --output bench_results.json
+    python benchmarks/bench_pipeline.py --baseline bench_results.json --threshold 0.2
+
+--baseline verilirse aynı (boyut, aşama) için süresi eşikten fazla artan aşamalar gerileme olarak
+raporlanır ve çıkış kodu 1 olur. Ara tablolar STORMSENTINEL_TABLE_FORMAT formatında yazılır.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import h5py
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STAGES = ['extract_tempo_data', 'calculate_aqi', 'generate_map', 'generate_grid',
+          'generate_chart_json', 'generate_action_json']
+# folium haritası piksel başına bir işaretçi üretir; bu satır sayısının üstünde atlanır
+DEFAULT_MAP_MAX_ROWS = 20000
+
+
+def make_tempo_granule(path, nlat, nlon, seed=0, nan_fraction=0.2):
+    """TEMPO L3 düzeninde (1, lat, lon) sentetik NO2 granülü yazar."""
+    rng = np.random.default_rng(seed)
+    data = rng.uniform(0, 2e17, (1, nlat, nlon))
+    data[rng.random(data.shape) < nan_fraction] = np.nan
+    with h5py.File(path, 'w') as f:
+        f['latitude'] = np.linspace(14, 58, nlat)
+        f['longitude'] = np.linspace(-135, -38, nlon)
+        f.create_dataset('product/vertical_column_troposphere', data=data,
+                         chunks=(1, min(nlat, 256), min(nlon, 512)))
+
+
+def _peak_rss_mb():
+    # Linux'ta ru_maxrss KB, macOS'ta bayt cinsindendir
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_stage(stage, paths):
+    """Tek aşamayı temiz bir süreçte çalıştırır ve ölçümleri döndürür (alt süreçte çalışır)."""
+    from modules.tempo_reader import extract_tempo_data
+    from modules.aqi_calculator import calculate_aqi
+    from modules.map_generator import generate_map
+    from modules.grid_tiles import generate_grid
+    from modules.chart_generator import generate_chart_json
+    from modules.generate_action import generate_action_json
+    from modules.storage import read_table
+
+    calls = {
+        'extract_tempo_data': lambda: extract_tempo_data(hdf_path=paths['hdf'], output_csv=paths['no2']),
+        'calculate_aqi': lambda: calculate_aqi(csv_path=paths['no2'], output_csv=paths['risk']),
+        'generate_map': lambda: generate_map(csv_path=paths['risk'], output_html=paths['map']),
+        'generate_grid': lambda: generate_grid(csv_path=paths['risk'], output_dir=paths['grid']),
+        'generate_chart_json': lambda: generate_chart_json(csv_path=paths['risk'], output_json=paths['chart']),
+        'generate_action_json': lambda: generate_action_json(csv_path=paths['risk'], output_json=paths['action']),
+    }
+
+    baseline_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    calls[stage]()
+    seconds = time.perf_counter() - start
+    peak_rss = _peak_rss_mb()
+
+    rows = len(read_table(paths['no2' if stage == 'extract_tempo_data' else 'risk'], columns=['latitude']))
+    return {
+        'stage': stage,
+        'seconds': round(seconds, 4),
+        'rows': rows,
+        'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+        'peak_rss_mb': round(peak_rss, 1),
+        'stage_rss_mb': round(peak_rss - baseline_rss, 1),
+    }
+
+
+def bench_size(nlat, nlon, workdir, map_max_rows):
+    from modules.storage import table_path
+
+    paths = {
+        'hdf': os.path.join(workdir, f'tempo_{nlat}x{nlon}.nc'),
+        'no2': table_path(os.path.join(workdir, 'tempo_no2.csv')),
+        'risk': table_path(os.path.join(workdir, 'tempo_aqi_risk.csv')),
+        'map': os.path.join(workdir, 'aqi_map.html'),
+        'grid': os.path.join(workdir, 'aqi_grid'),
+        'chart': os.path.join(workdir, 'aqi_chart_data.json'),
+        'action': os.path.join(workdir, 'aqi_action.json'),
+    }
+    make_tempo_granule(paths['hdf'], nlat, nlon)
+
+    results, risk_rows = [], 0
+    for stage in STAGES:
+        if stage == 'generate_map' and risk_rows > map_max_rows:
+            results.append({'stage': stage, 'skipped': f"rows > {map_max_rows}"})
+            print(f"  {stage:<22} atlandı ({risk_rows} satır > {map_max_rows})")
+            continue
+        # Her aşama yeni bir süreçte: RSS ölçümü önceki aşamalardan etkilenmez
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            result = pool.submit(run_stage, stage, paths).result()
+        results.append(result)
+        if stage == 'calculate_aqi':
+            risk_rows = result['rows']
+        print(f"  {stage:<22} {result['seconds']:>9.3f} sn {result['rows_per_sec'] or 0:>13,.0f} satır/sn "
+              f"{result['peak_rss_mb']:>8.1f} MB")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Süresi baseline'a göre `threshold` oranından fazla artan (boyut, aşama) çiftleri."""
+    previous = {(r['size'], s['stage']): s for r in baseline['runs'] for s in r['stages'] if 'seconds' in s}
+    regressions = []
+    for run in results['runs']:
+        for stage in run['stages']:
+            old = previous.get((run['size'], stage['stage']))
+            if old and 'seconds' in stage and stage['seconds'] > old['seconds'] * (1 + threshold):
+                regressions.append((run['size'], stage['stage'], old['seconds'], stage['seconds']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['200x300', '800x1200', '2000x3000'],
+                        help="Izgara boyutları: enlem x boylam")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--map-max-rows', type=int, default=DEFAULT_MAP_MAX_ROWS)
+    parser.add_argument('--baseline', default=None, help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Gerileme eşiği (0.2 = %%20 yavaşlama)")
+    args = parser.parse_args()
+
+    results = {
+        'commit': _git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'table_format': os.environ.get('STORMSENTINEL_TABLE_FORMAT', 'csv'),
+        'runs': [],
+    }
+    with tempfile.TemporaryDirectory(prefix='bench_tempo_') as workdir:
+        for size in args.sizes:
+            nlat, nlon = (int(v) for v in size.lower().split('x'))
+            print(f"📐 {size} ({nlat * nlon:,} piksel)")
+            results['runs'].append({'size': size, 'pixels': nlat * nlon,
+                                    'stages': bench_size(nlat, nlon, workdir, args.map_max_rows)})
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Sonuçlar yazıldı → {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for size, stage, old, new in regressions:
+            print(f"❌ Gerileme: {size} {stage} {old:.3f} sn → {new:.3f} sn")
+        if regressions:
+            sys.exit(1)
+        print("✅ Gerileme yok.")
+
+
+if __name__ == '__main__':
+    main()
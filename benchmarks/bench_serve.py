@@ -0,0 +1,188 @@
+"""
+Panel rotalarının yük testi: saniyedeki istek sayısı ve gecikme yüzdelikleri.
+
+Sunucu bu betik tarafından başlatılır (gunicorn çok işçili, waitress veya Flask) ya da --url ile var olan
+bir sunucu ölçülür. Her rota --duration saniye boyunca --concurrency adet keep-alive bağlantıyla yüklenir.
+--republish verilirse ölçüm sırasında grafik/karar destek JSON'ları (aynı içerikle) sürekli yeniden yayımlanır;
+okuyucuların hiçbir zaman yarım dosya görmediği her yanıtın JSON olarak ayrıştırılmasıyla doğrulanır.
+
+Kullanım:
+    python benchmarks/bench_serve.py --server gunicorn --workers 4 --concurrency 16 --duration 5
+    python benchmarks/bench_serve.py --server waitress --republish
+    python benchmarks/bench_serve.py --url http://127.0.0.1:8000 --output bench_serve.json
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ROUTES = ['/', '/aqi_panel', '/aqi_map', '/aqi_chart_data', '/aqi_action_data', '/decision_support',
+          '/aqi_grid?bbox=-130,20,-60,55&zoom=4']
+JSON_ROUTES = {'/aqi_chart_data', '/aqi_action_data'}
+PUBLISHED = [os.path.join(ROOT, 'static', 'aqi_chart_data.json'), os.path.join(ROOT, 'static', 'aqi_action.json')]
+STARTUP_TIMEOUT = 60
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, workers, threads):
+    """Sunucuyu alt süreçte başlatır ve yanıt vermeye başlayana kadar bekler."""
+    env = dict(os.environ, STORMSENTINEL_HOST='127.0.0.1', STORMSENTINEL_PORT=str(port),
+               STORMSENTINEL_WORKERS=str(workers), STORMSENTINEL_THREADS=str(threads), STORMSENTINEL_SERVER=kind)
+    if kind == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    else:
+        cmd = [sys.executable, 'app.py']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{kind} sunucusu başlatılamadı (çıkış kodu {proc.returncode})")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{kind} sunucusu {STARTUP_TIMEOUT} sn içinde yanıt vermedi")
+
+
+def load_route(host, port, route, concurrency, duration):
+    """Rotayı `concurrency` bağlantıyla `duration` sn yükler; (gecikmeler, hata sayısı, bozuk JSON sayısı)."""
+    latencies, errors, corrupt = [], [0], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', route)
+                response = conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                with lock:
+                    errors[0] += 1
+                continue
+            local.append(time.perf_counter() - start)
+            if response.status >= 400:
+                with lock:
+                    errors[0] += 1
+            elif route in JSON_ROUTES:
+                try:
+                    json.loads(body)
+                except ValueError:
+                    with lock:
+                        corrupt[0] += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return latencies, errors[0], corrupt[0]
+
+
+def republish(stop):
+    """Yayımlanan JSON'ları aynı içerikle sürekli yeniden yazar (atomik yayımlama testi)."""
+    from modules.payloads import write_json_bytes
+    bodies = {path: open(path, 'rb').read() for path in PUBLISHED if os.path.exists(path)}
+    while not stop.is_set():
+        for path, body in bodies.items():
+            write_json_bytes(body, path)
+        time.sleep(0.005)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Var olan sunucu (verilirse sunucu başlatılmaz)")
+    parser.add_argument('--server', choices=['gunicorn', 'waitress', 'flask'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn işçi sayısı")
+    parser.add_argument('--threads', type=int, default=4, help="İşçi başına iş parçacığı")
+    parser.add_argument('--concurrency', type=int, default=16, help="Eşzamanlı istemci bağlantısı")
+    parser.add_argument('--duration', type=float, default=5.0, help="Rota başına süre (sn)")
+    parser.add_argument('--routes', nargs='+', default=ROUTES)
+    parser.add_argument('--republish', action='store_true', help="Ölçüm sırasında JSON çıktılarını yeniden yayımla")
+    parser.add_argument('--output', help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+        label = args.url
+    else:
+        host, port = '127.0.0.1', free_port()
+        proc = start_server(args.server, port, args.workers, args.threads)
+        label = f"{args.server} ({args.workers} işçi × {args.threads} iş parçacığı)" if args.server == 'gunicorn' \
+            else args.server
+
+    stop = threading.Event()
+    publisher = None
+    if args.republish:
+        publisher = threading.Thread(target=republish, args=(stop,), daemon=True)
+        publisher.start()
+
+    print(f"🌐 {label}, {args.concurrency} bağlantı, rota başına {args.duration} sn")
+    print(f"{'rota':>40} {'istek/sn':>9} {'p50_ms':>8} {'p95_ms':>8} {'hata':>6}")
+    results, ok = [], True
+    try:
+        for route in args.routes:
+            latencies, errors, corrupt = load_route(host, port, route, args.concurrency, args.duration)
+            ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+            row = {
+                'route': route,
+                'requests': len(latencies),
+                'rps': round(len(latencies) / args.duration, 1),
+                'p50_ms': round(float(np.percentile(ms, 50)), 2),
+                'p95_ms': round(float(np.percentile(ms, 95)), 2),
+                'errors': errors,
+                'corrupt': corrupt,
+            }
+            results.append(row)
+            print(f"{route:>40} {row['rps']:9.1f} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {errors:6d}")
+            if corrupt:
+                print(f"   ❌ {corrupt} yanıt yarım/bozuk JSON içeriyordu")
+                ok = False
+    finally:
+        stop.set()
+        if publisher:
+            publisher.join()
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'server': label, 'concurrency': args.concurrency, 'duration': args.duration,
+                       'results': results}, f, indent=2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+PixelIndex.bbox_stats: hücre özetli sorgu ile tüm pikselleri tarayan (ham) sorgunun karşılaştırması.
+
+Her bbox için ham yol, kutudaki piksellerin tamamı üzerinden np.percentile hesaplar; hücre özetli yol
+tamamen kapsanan hücrelerde önceden hesaplanmış adet/toplam/en büyük/histogramı kullanır. İki yolun
+sonuçları aynı olmalıdır (yüzdelikler dahil); farklıysa çıkış kodu 1 olur.
+
+Kullanım:
+    python benchmarks/bench_spatial.py                  # 10^6 ve 10^7 piksel
+    python benchmarks/bench_spatial.py --sizes 1000000 --repeat 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.aqi_calculator import calculate_aqi_scores  # noqa: E402
+from modules.spatial_index import PixelIndex, STAT_PERCENTILES  # noqa: E402
+
+BBOXES = {
+    'tam alan': (-180, -90, 180, 90),
+    'ABD': (-130, 20, -60, 55),
+    'bölge': (-100.1, 30.3, -80.7, 40.9),
+    'şehir': (-95, 33, -93, 35),
+}
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    no2 = rng.lognormal(np.log(2e16), 0.6, n)
+    return pd.DataFrame({
+        'latitude': rng.uniform(14, 58, n),
+        'longitude': rng.uniform(-135, -45, n),
+        'NO2_column': no2,
+        'aqi': calculate_aqi_scores(no2),
+    })
+
+
+def raw_stats(index, bbox):
+    idx = index.bbox(*bbox)
+    stats = {'count': int(len(idx))}
+    for name, values in (('aqi', index.aqi[idx]), ('NO2_column', index.no2[idx])):
+        if len(idx):
+            stats[name] = {
+                'mean': float(values.mean()),
+                'max': float(values.max()),
+                **{f'p{p}': float(v) for p, v in zip(STAT_PERCENTILES, np.percentile(values, STAT_PERCENTILES))},
+            }
+    return stats
+
+
+def same(a, b):
+    if a['count'] != b['count'] or a.keys() != b.keys():
+        return False
+    return all(np.isclose(a[name][k], b[name][k], rtol=1e-9) for name in a if name != 'count' for k in a[name])
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**6, 10**7])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'piksel':>10} {'bbox':>10} {'adet':>10} {'ham_ms':>9} {'özet_ms':>9} {'hızlanma':>9}")
+    for n in args.sizes:
+        start = time.perf_counter()
+        index = PixelIndex(make_frame(n))
+        print(f"🧭 {n} piksel: indeks {time.perf_counter() - start:.2f} sn")
+        for label, bbox in BBOXES.items():
+            raw_ms, expected = best_ms(lambda: raw_stats(index, bbox), args.repeat)
+            fast_ms, got = best_ms(lambda: index.bbox_stats(*bbox), args.repeat)
+            if not same(expected, got):
+                print(f"   ❌ {label}: hücre özetli sonuç ham sonuçtan farklı")
+                ok = False
+            print(f"{n:>10} {label:>10} {got['count']:>10} {raw_ms:>9.1f} {fast_ms:>9.2f} {raw_ms / fast_ms:>8.1f}x")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Web sunucusu açılış süresi ve içe aktarma bütçesi.
+
+Her tekrar temiz bir süreçte `import app` süresini ölçer, ardından şablon rotalarını (/, /data_sources,
+/aqi_map) ve hazır JSON yüklerini sunan panel rotalarını (/aqi_chart_data, /aqi_action_data, /aqi_panel,
+/decision_support) test istemcisiyle çağırır. Bu rotalardan sonra ağır kütüphanelerin (pandas, numpy, h5py, folium)
+hâlâ yüklenmemiş olması ve medyan açılış süresinin --budget-ms altında kalması beklenir; aksi halde çıkış
+kodu 1 olur (CI'da içe aktarma bütçesi denetimi olarak kullanılabilir). Hesaplama rotasının ilk çağrısı
+(tembel yükleme maliyeti) ayrıca raporlanır.
+
+Kullanım:
+    python benchmarks/bench_startup.py --repeat 5 --budget-ms 750
+    python benchmarks/bench_startup.py --top 15   # -X importtime ile en pahalı modüller
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'h5py', 'folium', 'pyarrow']
+LIGHT_ROUTES = ['/', '/data_sources', '/aqi_map', '/aqi_chart_data', '/aqi_action_data', '/aqi_panel',
+                '/decision_support']
+COMPUTE_ROUTE = '/aqi_bbox_stats'
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - start) * 1000
+heavy = {heavy!r}
+client = app.app.test_client()
+status = {{route: client.get(route).status_code for route in {light!r}}}
+loaded_light = [m for m in heavy if m in sys.modules]
+start = time.perf_counter()
+compute_status = client.get({compute!r}).status_code
+compute_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{'import_ms': import_ms, 'status': status, 'loaded_after_light': loaded_light,
+                  'compute_status': compute_status, 'compute_first_ms': compute_ms,
+                  'loaded_after_compute': [m for m in heavy if m in sys.modules]}}))
+"""
+
+
+def probe():
+    code = PROBE.format(root=ROOT, heavy=HEAVY_MODULES, light=LIGHT_ROUTES, compute=COMPUTE_ROUTE)
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top):
+    """`python -X importtime -c 'import app'` çıktısından kümülatif süresi en yüksek modüller."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=750.0, help="Medyan `import app` süresi üst sınırı")
+    parser.add_argument('--top', type=int, default=0, help="En pahalı N modülü listele (-X importtime)")
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.repeat)]
+    import_ms = [r['import_ms'] for r in runs]
+    median = statistics.median(import_ms)
+    last = runs[-1]
+    print(f"🚀 import app: medyan {median:.0f} ms, en az {min(import_ms):.0f} ms ({args.repeat} tekrar)")
+    print(f"   şablon/panel rotaları: {last['status']}")
+    print(f"   ilk {COMPUTE_ROUTE} çağrısı (tembel yükleme dahil): {last['compute_first_ms']:.0f} ms "
+          f"→ {', '.join(last['loaded_after_compute']) or '-'}")
+
+    ok = True
+    loaded = sorted({m for r in runs for m in r['loaded_after_light']})
+    if loaded:
+        print(f"   ❌ şablon/panel rotalarından sonra yüklenen ağır modüller: {', '.join(loaded)}")
+        ok = False
+    else:
+        print(f"   ✅ şablon/panel rotaları ağır modül yüklemedi ({', '.join(HEAVY_MODULES)})")
+    if median > args.budget_ms:
+        print(f"   ❌ açılış bütçesi aşıldı: {median:.0f} ms > {args.budget_ms:.0f} ms")
+        ok = False
+    else:
+        print(f"   ✅ açılış bütçe içinde: {median:.0f} ms ≤ {args.budget_ms:.0f} ms")
+
+    if args.top:
+        print(f"{'kümülatif_ms':>13}  modül")
+        for micros, name in import_profile(args.top):
+            print(f"{micros / 1000:13.1f}  {name}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Granül indirici (modules/granule_fetcher) için yerel HTTP sunucusu (Earthdata/S3 yerine geçer).
+
+Bir klasördeki dosyaları HTTP/1.1 keep-alive ve Range (206) desteğiyle sunar. Test için gecikme ve bağlantı
+başına hız sınırı eklenebilir, her dosyanın ilk isteği belirli bir bayttan sonra kesilebilir (sürdürme testi)
+ve /redirect/<ad> yolu dosyaya 302 ile yönlendirir. İstek ve bağlantı sayıları `server.stats` içinde tutulur.
+
+Kullanım:
+    python benchmarks/granule_server.py data/granules_src --port 8765 --latency 0.05 --rate 20000000
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE_PATTERN = re.compile(r'bytes=(\d+)-(\d*)')
+CHUNK_SIZE = 64 * 1024
+
+
+class GranuleHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+        if server.latency:
+            time.sleep(server.latency)
+
+        name = self.path.lstrip('/')
+        if name.startswith('redirect/'):
+            self.send_response(302)
+            self.send_header('Location', '/' + name[len('redirect/'):])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        path = os.path.join(server.root, os.path.basename(name))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = RANGE_PATTERN.fullmatch(self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            server.count('range_requests')
+        else:
+            self.send_response(200)
+        length = end - start + 1
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+        # Sürdürme testi: dosyanın ilk isteği `truncate_after` bayttan sonra kesilir
+        cut = None
+        if server.truncate_after and server.first_request(name):
+            cut = server.truncate_after
+
+        with open(path, 'rb') as f:
+            f.seek(start)
+            sent = 0
+            while sent < length:
+                chunk = f.read(min(CHUNK_SIZE, length - sent))
+                if cut is not None and sent + len(chunk) > cut:
+                    self.wfile.write(chunk[:cut - sent])
+                    server.count('bytes_sent', cut - sent)
+                    self.close_connection = True
+                    return
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                server.count('bytes_sent', len(chunk))
+                if server.rate:
+                    time.sleep(len(chunk) / server.rate)
+
+
+class GranuleServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, root, port=0, latency=0.0, truncate_after=None, rate=None):
+        super().__init__(('127.0.0.1', port), GranuleHandler)
+        self.root = root
+        self.latency = latency
+        self.rate = rate
+        self.truncate_after = truncate_after
+        self.stats = {'requests': 0, 'connections': 0, 'range_requests': 0, 'bytes_sent': 0}
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def first_request(self, name):
+        with self._lock:
+            first = name not in self._seen
+            self._seen.add(name)
+            return first
+
+
+def serve_in_thread(root, **kwargs):
+    """Sunucuyu arka plan iş parçacığında başlatır; (sunucu, thread) döndürür."""
+    server = GranuleServer(root, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Granül klasörünü Range destekli HTTP/1.1 ile sunar.")
+    parser.add_argument('root', help="Sunulacak klasör")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="İstek başına gecikme (sn)")
+    parser.add_argument('--truncate-after', type=int, default=None, help="Her dosyanın ilk isteğini N bayttan sonra kes")
+    parser.add_argument('--rate', type=float, default=None, help="Bağlantı başına hız sınırı (bayt/sn)")
+    args = parser.parse_args()
+    server = GranuleServer(args.root, args.port, args.latency, args.truncate_after, args.rate)
+    print(f"🛰️ {os.path.abspath(args.root)} → {server.url}")
+    server.serve_forever()
@@ -0,0 +1,29 @@
+# 🚀 Üretim sunucusu: gunicorn -c gunicorn.conf.py app:app
+# İşçiler çıktıları (harita hücreleri, grafik/karar destek JSON'u) dosya sisteminden paylaşır; çıktılar
+# geçici dosya + rename ile yayımlandığı için okuyucular yarım dosya görmez. /update_data akışını
+# data/jobs altındaki dosya kilidini alan tek işçi çalıştırır, diğerleri o işe bağlanır.
+import multiprocessing
+import os
+import shutil
+
+bind = f"{os.environ.get('STORMSENTINEL_HOST', '0.0.0.0')}:{os.environ.get('STORMSENTINEL_PORT', '8000')}"
+workers = int(os.environ.get('STORMSENTINEL_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+# gthread: her işçi birkaç isteği eşzamanlı karşılar; veri akışı işçinin arka plan iş parçacığında çalışır
+worker_class = 'gthread'
+threads = int(os.environ.get('STORMSENTINEL_THREADS', '4'))
+# Uygulama fork'tan önce yüklenmez: JobRunner iş parçacıkları, önbellekler ve HDF5 tanıtıcıları işçi başına oluşur
+preload_app = False
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-' if os.environ.get('STORMSENTINEL_ACCESS_LOG') == '1' else None
+
+# 📊 /metrics her istekte rastgele bir işçiye düşer; işçiler ölçümlerini ortak klasöre yazar ve /metrics
+# hepsinin toplamını döner (ölen işçilerin dosyaları kalır, sayaçları kaybolmaz). Klasör açılışta temizlenir.
+METRICS_DIR = os.environ.setdefault('STORMSENTINEL_METRICS_DIR',
+                                    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'metrics'))
+
+
+def on_starting(server):
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR, exist_ok=True)
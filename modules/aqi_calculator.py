@@ -2,27 +2,31 @@ import pandas as pd
 import os
 import numpy as np
 
+from modules import metrics
+from modules.storage import read_table, write_table, atomic_output, require_csv
+from modules.tempo_reader import iter_tempo_blocks
+from modules.zones import load_zones
+
 # 📁 Dosya yolları
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(BASE_DIR, 'data', 'tempo_no2.csv')           # NO2 verisi
 RISK_PATH = os.path.join(BASE_DIR, 'data', 'tempo_aqi_risk.csv')     # AQI skorları
 
-# 📍 Kuzey Amerika zonlama fonksiyonu
+# 📍 Zon tanımları config/zones.geojson dosyasından yüklenir (sıralı, ilk eşleşen kazanır)
+ZONES = load_zones()
+OUTSIDE_ZONE = ZONES.outside
+ZONE_NAMES = ZONES.names
+
+# 📍 Kuzey Amerika zonlama fonksiyonu (tek nokta)
 def define_us_region(lat, lon):
-    if 45 <= lat <= 55 and -130 <= lon <= -100:
-        return 'Northwest'
-    elif 40 <= lat <= 50 and -100 < lon <= -70:
-        return 'North Central'
-    elif 40 <= lat <= 50 and -70 < lon <= -40:
-        return 'Northeast'
-    elif 30 <= lat < 45 and -120 <= lon <= -100:
-        return 'Southwest'
-    elif 10 <= lat < 40 and -100 < lon <= -70:
-        return 'South Central'
-    elif 25 <= lat < 40 and -70 < lon <= -40:
-        return 'Southeast'
-    else:
-        return 'Outside TEMPO Area'
+    return ZONES.zone_of(lat, lon)
+
+# 📍 Vektörel zonlama: her piksel için zon kodu (ZONE_NAMES indeksi) döndürür
+def define_us_region_codes(lat, lon):
+    return ZONES.lookup(lat, lon)
+
+def define_us_regions(lat, lon):
+    return ZONE_NAMES[define_us_region_codes(lat, lon)]
 
 # 🌫️ NO2 → AQI dönüşüm fonksiyonu (EPA eşiklerine yakınlaştırılmış)
 def calculate_aqi_score(no2_concentration):
@@ -35,6 +39,23 @@ def calculate_aqi_score(no2_concentration):
     else:
         return int(150 + (no2_concentration - 1.0e17) / 1.0e17 * 100)  # Unhealthy+
 
+# 🌫️ AQI kırılma noktası tablosu (calculate_aqi_score ile aynı parçalı doğrusal eşikler)
+NO2_BREAKPOINTS = np.array([1.5e16, 2.8e16, 1.0e17])
+NO2_SEGMENT_LOW = np.array([0.0, 1.5e16, 2.8e16, 1.0e17])
+NO2_SEGMENT_SPAN = np.array([1.5e16, 2.8e16 - 1.5e16, 1.0e17 - 2.8e16, 1.0e17])
+AQI_SEGMENT_LOW = np.array([0, 50, 100, 150])
+AQI_SEGMENT_SPAN = np.array([50, 50, 50, 100])
+
+# 🌫️ Vektörel NO2 → AQI dönüşümü (searchsorted ile segment seçimi, int() gibi sıfıra doğru keser)
+# calculate_aqi_score gibi NaN/sonsuz değerde hata verir (int64'e sessizce taşmaz); çağıran önce filtrelemeli
+def calculate_aqi_scores(no2_concentration):
+    no2 = np.asarray(no2_concentration, dtype=float)
+    if not np.isfinite(no2).all():
+        raise ValueError(f"NO2 değerleri sonlu olmalı ({int((~np.isfinite(no2)).sum())} NaN/sonsuz değer)")
+    seg = np.searchsorted(NO2_BREAKPOINTS, no2, side='right')
+    scores = AQI_SEGMENT_LOW[seg] + (no2 - NO2_SEGMENT_LOW[seg]) / NO2_SEGMENT_SPAN[seg] * AQI_SEGMENT_SPAN[seg]
+    return np.trunc(scores).astype(np.int64)
+
 # 🔴 Risk seviyesini kategorik olarak belirleme
 def risk_level(score):
     if score <= 50: return 'Low'
@@ -42,52 +63,142 @@ def risk_level(score):
     elif score <= 150: return 'High'
     else: return 'Very High'
 
-# 🧮 Ana AQI hesaplama fonksiyonu
-def calculate_aqi(csv_path=CSV_PATH, output_csv=RISK_PATH):
-    if not os.path.exists(csv_path):
-        print(f"❌ CSV dosyası bulunamadı: {csv_path}")
-        return None
+RISK_BREAKPOINTS = np.array([50, 100, 150])
+RISK_LEVEL_NAMES = np.array(['Low', 'Moderate', 'High', 'Very High'], dtype=object)
 
-    df = pd.read_csv(csv_path)
+# 🔴 Vektörel risk seviyesi (NaN, risk_level gibi 'Very High' olur)
+def risk_levels(scores):
+    return RISK_LEVEL_NAMES[np.searchsorted(RISK_BREAKPOINTS, np.asarray(scores, dtype=float), side='left')]
 
+# 🧮 Bellek içi AQI hesaplama: NO2 tablosunu alır, risk tablosunu döndürür (hata durumunda None)
+def compute_aqi_frame(df):
     # Sütun adını dönüştür (uyumluluk için)
     if 'no2' in df.columns:
-        df.rename(columns={'no2': 'NO2_column'}, inplace=True)
+        df = df.rename(columns={'no2': 'NO2_column'})
 
     required_columns = {'latitude', 'longitude', 'NO2_column'}
     if df.empty:
-        print("⚠️ CSV dosyası boş.")
+        print("⚠️ NO2 verisi boş.")
         return None
     if not required_columns.issubset(df.columns):
-        print(f"⚠️ CSV sütunları eksik. Gerekli sütunlar: {required_columns}")
+        print(f"⚠️ Sütunlar eksik. Gerekli sütunlar: {required_columns}")
         print(f"📄 Mevcut sütunlar: {list(df.columns)}")
         return None
 
+    # 0️⃣ NaN/sonsuz NO2 değerli pikselleri at (skor ve zon ortalamalarını bozmasın)
+    finite = np.isfinite(df['NO2_column'].to_numpy(dtype=float))
+    if not finite.all():
+        print(f"⚠️ {int((~finite).sum())} satırda NO2 değeri NaN/sonsuz, atlandı.")
+        df = df[finite].reset_index(drop=True)
+        if df.empty:
+            print("⚠️ Sonlu NO2 değeri yok.")
+            return None
+
     # 1️⃣ AQI skoru hesapla
-    df['AQI_score'] = df['NO2_column'].apply(calculate_aqi_score)
+    aqi = calculate_aqi_scores(df['NO2_column'].to_numpy())
 
     # 2️⃣ Zonları ata
-    df['zone'] = df.apply(lambda row: define_us_region(row['latitude'], row['longitude']), axis=1)
+    # Not: ızgara geometrisi önbelleği (grid_cache) yalnızca HDF5 okuyan akış/toplu yollarda kullanılır. Burada
+    # girdi bir piksel tablosudur; tablodan ızgara indeksini çıkarmak (eksen + piksel başına indeks) zonların
+    # doğrudan değerlendirilmesinden / ZoneSet.lookup raster'ından daha pahalıdır (7.5M pikselde ~0.7 sn'ye karşı
+    # ~0.3-0.5 sn), bu yüzden zonlama koordinatlardan yapılır.
+    codes = define_us_region_codes(df['latitude'].to_numpy(), df['longitude'].to_numpy())
 
     # 3️⃣ TEMPO kapsama dışı veriyi filtrele
-    df = df[df['zone'] != 'Outside TEMPO Area'].copy()
+    inside = codes != ZONES.outside_code
+    df = df.loc[inside, ['latitude', 'longitude', 'NO2_column']].reset_index(drop=True)
+    df['zone'] = ZONE_NAMES[codes[inside]]
+    df['aqi'] = aqi[inside]  # Harita modülü için 'aqi' sütunu
 
-    # 4️⃣ Zon bazlı ortalama risk skoru
-    zone_risk = df.groupby('zone', observed=False)['AQI_score'].mean().round(0).reset_index()
-    zone_risk.columns = ['zone', 'risk_score']
-
-    # 5️⃣ Tüm verilere zon risk skorunu ekle
-    df = df.merge(zone_risk, on='zone', how='left')
+    # 4️⃣ + 5️⃣ Zon bazlı ortalama risk skorunu tüm verilere ekle
+    df['risk_score'] = df.groupby('zone', observed=False)['aqi'].transform('mean').round(0)
 
     # 6️⃣ Risk seviyesini kategorik olarak ekle
-    df['risk_level'] = df['risk_score'].apply(risk_level)
+    df['risk_level'] = risk_levels(df['risk_score'].to_numpy())
+
+    metrics.inc('rows_processed_total', len(df), stage='aqi')
+
+    # 7️⃣ Sadece gerekli sütunlar
+    return df[['latitude', 'longitude', 'NO2_column', 'zone', 'aqi', 'risk_score', 'risk_level']]
 
-    # 7️⃣ Harita modülü için 'aqi' sütonunu ekle
-    df.rename(columns={'AQI_score': 'aqi'}, inplace=True)
+# 🧮 Ana AQI hesaplama fonksiyonu (tablo → tablo, format uzantıdan belirlenir)
+@metrics.instrumented
+def calculate_aqi(csv_path=CSV_PATH, output_csv=RISK_PATH):
+    if not os.path.exists(csv_path):
+        print(f"❌ CSV dosyası bulunamadı: {csv_path}")
+        return None
 
-    # 8️⃣ Sadece gerekli sütunları kaydet
-    df = df[['latitude', 'longitude', 'NO2_column', 'zone', 'aqi', 'risk_score', 'risk_level']]
+    df = compute_aqi_frame(read_table(csv_path))
+    if df is None:
+        return None
 
-    df.to_csv(output_csv, index=False)
+    write_table(df, output_csv)
     print(f"✅ AQI Risk Skoru hesaplandı ve {output_csv} dosyasına kaydedildi.")
-    return output_csv
\ No newline at end of file
+    return output_csv
+
+# 🌊 Akış modu: NO2 bloklarını (iter_tempo_blocks) skorlar, zon ortalaması olmadan üretir
+def score_blocks(blocks):
+    for block in blocks:
+        if 'zone' in block.columns:
+            # Izgara önbelleğinden zonlanmış blok (iter_tempo_blocks(zoned=True)): yalnızca zon içi pikseller
+            metrics.inc('rows_processed_total', len(block), stage='aqi_stream')
+            block = block.rename(columns={'no2': 'NO2_column'})
+            block['aqi'] = calculate_aqi_scores(block['NO2_column'].to_numpy())
+            yield block
+            continue
+        codes = define_us_region_codes(block['latitude'].to_numpy(), block['longitude'].to_numpy())
+        inside = codes != ZONES.outside_code
+        metrics.inc('rows_processed_total', int(inside.sum()), stage='aqi_stream')
+        if not inside.any():
+            continue
+        no2 = block['no2'].to_numpy()[inside]
+        yield pd.DataFrame({
+            'latitude': block['latitude'].to_numpy()[inside],
+            'longitude': block['longitude'].to_numpy()[inside],
+            'NO2_column': no2,
+            'zone': ZONE_NAMES[codes[inside]],
+            'aqi': calculate_aqi_scores(no2),
+        })
+
+# 🌊 Skorlanmış bloklardan zon bazlı AQI toplamı/sayacı: {zone: [toplam, sayı]} (birleştirilebilir)
+def zone_aqi_totals(scored_blocks, totals=None):
+    totals = {} if totals is None else totals
+    for block in scored_blocks:
+        grouped = block.groupby('zone')['aqi'].agg(['sum', 'count'])
+        for zone, row in grouped.iterrows():
+            acc = totals.setdefault(zone, [0, 0])
+            acc[0] += int(row['sum'])
+            acc[1] += int(row['count'])
+    return totals
+
+# 🌊 Zon bazlı ortalama risk skoru (toplam/sayaç ile)
+def zone_risk_scores(scored_blocks):
+    totals = zone_aqi_totals(scored_blocks)
+    return {zone: round(total / count) for zone, (total, count) in totals.items()}
+
+# 🌊 Akış modunda AQI hesaplama: HDF5 → risk CSV, bellek blok boyutuyla sınırlı (iki geçiş)
+# `region` (bbox veya zon adı) verilirse yalnızca o bölgenin hiperdilimi okunur; çıktı yalnızca .csv olabilir
+@metrics.instrumented
+def calculate_aqi_stream(hdf_path, output_csv=RISK_PATH, block_rows=None, region=None):
+    require_csv(output_csv)
+    try:
+        # 1. geçiş: zon ortalamaları
+        zone_risk = zone_risk_scores(score_blocks(iter_tempo_blocks(hdf_path, block_rows, zoned=True, region=region)))
+        if not zone_risk:
+            print("⚠️ TEMPO kapsama alanında veri yok.")
+            return None
+
+        # 2. geçiş: risk skorunu ekleyip blok blok yaz
+        total = 0
+        with atomic_output(output_csv) as tmp_path, open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+            for block in score_blocks(iter_tempo_blocks(hdf_path, block_rows, zoned=True, region=region)):
+                block['risk_score'] = block['zone'].map(zone_risk).astype(float)
+                block['risk_level'] = risk_levels(block['risk_score'].to_numpy())
+                block.to_csv(out, index=False, header=(total == 0))
+                total += len(block)
+    except Exception as e:
+        print(f"❌ Akış modunda AQI hesaplama hatası: {e}")
+        return None
+
+    print(f"✅ AQI Risk Skoru {total} satır için akış modunda hesaplandı → {output_csv}")
+    return output_csv
@@ -0,0 +1,134 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# 📁 `python modules/batch_ingest.py` ile doğrudan çalıştırıldığında da `modules` paketi bulunsun
+# (eşdeğeri: depo kökünden `python -m modules.batch_ingest`)
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import metrics
+from modules.aqi_calculator import score_blocks
+from modules.storage import write_table
+from modules.tempo_reader import iter_tempo_blocks, granule_timestamp
+from modules.timeseries import TimeSeriesStore, aggregate_scored, merge_aggregates
+
+# ⚙️ Web sunucusuna CPU payı bırakmak için varsayılan işçi sayısı: çekirdek sayısı - 1
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+GRANULE_PATTERNS = ('*.nc', '*.h5', '*.he5', '*.HDF5')
+
+
+def resolve_granules(source):
+    """Klasör, glob deseni veya dosya listesinden sıralı granül yolları üretir."""
+    if isinstance(source, (list, tuple)):
+        return sorted(source)
+    if os.path.isdir(source):
+        paths = []
+        for pattern in GRANULE_PATTERNS:
+            paths.extend(glob.glob(os.path.join(source, pattern)))
+        return sorted(set(paths))
+    return sorted(glob.glob(source))
+
+
+def ingest_granule(hdf_path, block_rows=None, region=None):
+    """
+    Tek granülü akış modunda okuyup skorlar (işçi sürecinde çalışır).
+    Zon toplamlarını, zaman serisi için zon/hücre toplamlarını ve süreyi döndürür.
+    `region` (bbox veya zon adı) verilirse yalnızca o bölge okunur.
+    """
+    start = time.perf_counter()
+    aggregates = None
+    for block in score_blocks(iter_tempo_blocks(hdf_path, block_rows, zoned=True, region=region)):
+        aggregates = merge_aggregates([aggregates, aggregate_scored(block)])
+    aggregates = aggregates or merge_aggregates([])
+
+    zones = aggregates['zones']
+    return {
+        'path': hdf_path,
+        'timestamp': granule_timestamp(hdf_path),
+        'rows': int(zones['pixels'].sum()),
+        'seconds': time.perf_counter() - start,
+        'zones': {z: [int(s), int(c)] for z, s, c in zip(zones['zone'], zones['aqi_sum'], zones['pixels'])},
+        'aggregates': aggregates,
+    }
+
+
+def ingest_granules(source, max_workers=None, block_rows=None, output_path=None, timeseries_dir=None, region=None):
+    """
+    Birden çok TEMPO granülünü süreç havuzunda paralel işler ve zon toplamlarını birleştirir.
+    `max_workers` ile işçi sayısı sınırlanır; sonuç zone/risk_score/pixels/granules tablosudur.
+    `timeseries_dir` verilirse her granülün zon/hücre toplamları zaman serisi deposuna eklenir.
+    `region` (bbox veya zon adı) ile yalnızca bölgesel yenileme yapılır.
+    """
+    paths = resolve_granules(source)
+    if not paths:
+        print(f"❌ Granül bulunamadı: {source}")
+        return None
+
+    workers = max(1, min(max_workers or DEFAULT_WORKERS, len(paths)))
+    print(f"🚀 {len(paths)} granül {workers} işçi ile işleniyor...")
+
+    start = time.perf_counter()
+    store = TimeSeriesStore(timeseries_dir) if timeseries_dir else None
+    merged, granules = {}, {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(ingest_granule, path, block_rows, region): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ {os.path.basename(path)} işlenemedi: {e}")
+                continue
+
+            metrics.observe('pipeline_stage_seconds', result['seconds'], stage='ingest_granule')
+            rate = result['rows'] / result['seconds'] if result['seconds'] else 0
+            print(f"✅ {os.path.basename(path)}: {result['rows']} piksel, "
+                  f"{result['seconds']:.2f} sn ({rate:,.0f} satır/sn)")
+            if store:
+                # Depoya yazma ana süreçte ve sırayla yapılır (bölüm dosyalarında yarış olmaz)
+                store.append(result['timestamp'], result['aggregates'])
+            for zone, (total, count) in result['zones'].items():
+                acc = merged.setdefault(zone, [0, 0])
+                acc[0] += total
+                acc[1] += count
+                granules[zone] = granules.get(zone, 0) + 1
+
+    if not merged:
+        print("⚠️ Hiçbir granülden veri üretilemedi.")
+        return None
+
+    summary = pd.DataFrame([
+        {'zone': zone, 'risk_score': round(total / count), 'pixels': count, 'granules': granules[zone]}
+        for zone, (total, count) in sorted(merged.items())
+    ])
+
+    duration = time.perf_counter() - start
+    rows = int(summary['pixels'].sum())
+    print(f"⏱️ Toplam: {rows} piksel, {duration:.2f} sn ({rows / duration:,.0f} satır/sn)")
+
+    if output_path:
+        write_table(summary, output_path)
+        print(f"✅ Zon özeti yazıldı → {output_path}")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TEMPO granüllerini paralel işleyip zon bazlı AQI özetini üretir.")
+    parser.add_argument('source', help="Granül klasörü veya glob deseni (ör. 'data/granules/*.nc')")
+    parser.add_argument('--workers', type=int, default=None, help=f"En fazla işçi süreci (varsayılan: {DEFAULT_WORKERS})")
+    parser.add_argument('--block-rows', type=int, default=None, help="Blok başına enlem satırı")
+    parser.add_argument('--output', default=None, help="Zon özeti çıktı tablosu (.csv/.parquet/...)")
+    parser.add_argument('--timeseries', default=None, help="Granül toplamlarının ekleneceği zaman serisi klasörü")
+    region = parser.add_mutually_exclusive_group()
+    region.add_argument('--bbox', default=None, help="Yalnızca bu bölgeyi oku: west,south,east,north")
+    region.add_argument('--zone', default=None, help="Yalnızca bu zonu oku (ör. 'Northeast')")
+    args = parser.parse_args()
+    ingest_granules(args.source, max_workers=args.workers, block_rows=args.block_rows, output_path=args.output,
+                    timeseries_dir=args.timeseries,
+                    region=tuple(map(float, args.bbox.split(','))) if args.bbox else args.zone)
@@ -1,70 +1,39 @@
-import pandas as pd
-import json
 import os
 
-def generate_chart_json(csv_path='data/tempo_aqi_risk.csv', output_json='static/aqi_chart_data.json'):
+import pandas as pd
+
+from modules import metrics
+from modules.derived_views import build_views
+from modules.payloads import encode_json, write_json_bytes
+from modules.storage import read_table
+from modules.timeseries import TimeSeriesStore
+from modules.zones import load_zones
+
+@metrics.instrumented
+def generate_chart_json(csv_path='data/tempo_aqi_risk.csv', output_json='static/aqi_chart_data.json', df=None, views=None):
     """
     AQI risk skorlarını okur ve bar grafik için gerekli JSON yapısını oluşturur.
-    Renkler AQI seviyelerine göre belirlenir.
+    Renkler AQI seviyelerine göre belirlenir (derived_views.AQI_CATEGORIES).
+    `df` verilirse CSV okunmaz, bellekteki risk tablosu kullanılır; `views` (build_views çıktısı)
+    verilirse zon özeti yeniden hesaplanmaz.
     """
-    if not os.path.exists(csv_path):
+    if views is None and df is None and not os.path.exists(csv_path):
         print(f"❌ Risk CSV dosyası bulunamadı: {os.path.abspath(csv_path)}")
         return
 
     try:
-        df = pd.read_csv(csv_path)
-
-        required_cols = {'zone', 'risk_score'}
-        if df.empty or not required_cols.issubset(df.columns):
-            print("⚠️ CSV içeriği eksik. 'zone' ve 'risk_score' sütunları gerekli.")
-            return
-
-        # --- AQI ve Bölge Tanımları ---
-        
-        # Kuzey Amerika bölgeleri
-        zone_labels_tr = {
-            'Northwest': 'Kuzeybatı', 'North Central': 'Kuzey Orta', 'Northeast': 'Kuzeydoğu',
-            'Southwest': 'Güneybatı', 'South Central': 'Güney Orta', 'Southeast': 'Güneydoğu'
-        }
-        zone_labels_en = {
-            'Northwest': 'Northwest', 'North Central': 'North Central', 'Northeast': 'Northeast',
-            'Southwest': 'Southwest', 'South Central': 'South Central', 'Southeast': 'Southeast'
-        }
+        if views is None:
+            if df is None:
+                df = read_table(csv_path, columns=['zone', 'risk_score'])
 
-        # AQI seviyelerine göre renk ataması
-        def get_aqi_color(score):
-            if score <= 50: return '#00e400'  # İyi (Green)
-            elif score <= 100: return '#ffff00'  # Orta (Yellow)
-            elif score <= 150: return '#ff7e00'  # Hassas Gruplar (Orange)
-            else: return '#ff0000'  # Sağlıksız (Red)
-        
-        # Her bir zonun ortalama risk skorunu al
-        zone_scores = (
-            df[['zone', 'risk_score']]
-            .drop_duplicates(subset=['zone']) # Her zondan bir satır yeterli
-            .groupby('zone', observed=False)
-            .mean()
-            .round(0) # AQI skorları tam sayı olmalıdır
-            .reset_index()
-            .sort_values('zone')
-        )
+            required_cols = {'zone', 'risk_score'}
+            if df.empty or not required_cols.issubset(df.columns):
+                print("⚠️ CSV içeriği eksik. 'zone' ve 'risk_score' sütunları gerekli.")
+                return
+            views = build_views(df)
 
-        chart_data = {
-            # Etiketleri Türkçe/İngilizce çevirme
-            "labels_tr": [zone_labels_tr.get(z, z) for z in zone_scores['zone']],
-            "labels_en": [zone_labels_en.get(z, z) for z in zone_scores['zone']],
-            "values": zone_scores['risk_score'].tolist(),
-            # Skorlara göre dinamik renk atama
-            "colors": [get_aqi_color(s) for s in zone_scores['risk_score']],
-            "title_tr": "TEMPO Bölgelerine Göre Ortalama AQI Skoru",
-            "title_en": "Average AQI Score by TEMPO Zone",
-            "max_value": 200 # Grafik limitini belirleyelim
-        }
-
-        # JSON dosyasını kaydet
-        with open(output_json, 'w', encoding='utf-8') as f:
-            json.dump(chart_data, f, ensure_ascii=False, indent=4)
-            
+        # JSON dosyasını kaydet (boşluksuz; geçici dosya + rename)
+        write_json_bytes(encode_json(views['chart']), output_json)
         print(f"✅ Çubuk grafik verisi oluşturuldu → {output_json}")
 
     except Exception as e:
@@ -72,4 +41,35 @@ def generate_chart_json(csv_path='data/tempo_aqi_risk.csv', output_json='static/
 
 # Örnek Çağrı (app.py içinde): 
 # from modules.chart_generator import generate_chart_json
-# generate_chart_json(csv_path=RISK_PATH, output_json=JSON_PATH)
\ No newline at end of file
+# generate_chart_json(csv_path=RISK_PATH, output_json=JSON_PATH)
+
+
+@metrics.instrumented
+def build_trend_data(timeseries_dir, start=None, end=None, resolution='hourly'):
+    """
+    Zaman serisi deposundan zon bazlı AQI trendini (çizgi grafik için) üretir.
+    Yalnızca [start, end] aralığındaki bölümler okunur.
+    """
+    df = TimeSeriesStore(timeseries_dir).query('zones', start=start, end=end, resolution=resolution)
+    times = sorted(df['time'].unique())
+    table = df.pivot_table(index='time', columns='zone', values='aqi_mean').reindex(times)
+    # Kuzey Amerika bölgeleri (etiketler config/zones.geojson'dan, çağrı anında)
+    zones = load_zones()
+    labels_tr, labels_en = zones.labels('tr'), zones.labels('en')
+
+    return {
+        "resolution": resolution,
+        "timestamps": [pd.Timestamp(t).isoformat() for t in times],
+        "series": [
+            {
+                "zone": zone,
+                "label_tr": labels_tr.get(zone, zone),
+                "label_en": labels_en.get(zone, zone),
+                # Eksik saat/gün için None (grafikte boşluk)
+                "values": [None if pd.isna(v) else float(v) for v in table[zone]],
+            }
+            for zone in sorted(table.columns)
+        ],
+        "title_tr": "TEMPO Bölgelerine Göre AQI Trendi",
+        "title_en": "AQI Trend by TEMPO Zone",
+    }
@@ -0,0 +1,95 @@
+from modules import metrics
+from modules.lazy import lazy_import
+
+# numpy ve zon tablosu yalnızca yük üretilirken (build_views) yüklenir; JSON sunumu modules/payloads içindedir
+np = lazy_import('numpy')
+
+# 🎨 AQI kategorileri: üst sınır (dahil), TR/EN ad, renk ve eylem önerileri — grafik ve karar destek için tek tablo
+AQI_CATEGORIES = [
+    {
+        'max': 50, 'level_tr': 'İyi', 'level_en': 'Good', 'color': '#00e400',  # Yeşil
+        'actions_tr': ['Açık hava aktiviteleri serbest ve önerilir.', 'Pencere/kapıları açmak güvenlidir.'],
+        'actions_en': ['Outdoor activities are permitted and encouraged.', 'Opening windows/doors is safe.'],
+    },
+    {
+        'max': 100, 'level_tr': 'Orta', 'level_en': 'Moderate', 'color': '#ffff00',  # Sarı
+        'actions_tr': ['Hassas gruplar (çocuklar, yaşlılar) uzun süreli açık hava aktivitesinden kaçınmalı.', 'Hava kalitesi izlenmeye devam edilmeli.'],
+        'actions_en': ['Sensitive groups should limit prolonged outdoor exertion.', 'Air quality monitoring should continue.'],
+    },
+    {
+        'max': 150, 'level_tr': 'Hassas Gruplar İçin Sağlıksız', 'level_en': 'Unhealthy for Sensitive Groups', 'color': '#ff7e00',  # Turuncu
+        'actions_tr': ['Astım/solunum problemi olanlar dışarı çıkmamalı.', 'Herkes yoğun efordan kaçınmalı.', 'Dışarıda N95/FFP2 maske kullanılması önerilir.'],
+        'actions_en': ['Individuals with respiratory issues should stay indoors.', 'Everyone should limit strenuous activity.', 'Use of N95/FFP2 masks is recommended outdoors.'],
+    },
+    {
+        'max': None, 'level_tr': 'Sağlıksız', 'level_en': 'Unhealthy', 'color': '#ff0000',  # Kırmızı
+        'actions_tr': ['🚨 Zorunlu olmadıkça dışarı çıkmayın.', 'Dışarıda maske kullanın.', 'Pencere/kapıları kapalı tutun.', 'Hava temizleyici (air purifier) kullanılması tavsiye edilir.'],
+        'actions_en': ['🚨 Avoid going outdoors unless necessary.', 'Use a mask outside.', 'Keep windows and doors closed.', 'Air purifier use is advised indoors.'],
+    },
+]
+CATEGORY_BOUNDS = [c['max'] for c in AQI_CATEGORIES[:-1]]
+
+CHART_TITLE_TR = "TEMPO Bölgelerine Göre Ortalama AQI Skoru"
+CHART_TITLE_EN = "Average AQI Score by TEMPO Zone"
+CHART_MAX_VALUE = 200
+
+
+def categorize(scores):
+    """Skor dizisi → AQI_CATEGORIES indeksi (skor <= üst sınır olan ilk kategori)."""
+    return np.searchsorted(np.asarray(CATEGORY_BOUNDS, dtype=float), np.asarray(scores, dtype=float), side='left')
+
+
+def zone_summary(df):
+    """
+    Risk tablosundan tek bir groupby ile zon özeti: ortalama risk skoru, piksel sayısı, kategori.
+    Satırlar zonların tablodaki ilk görünme sırasındadır.
+    """
+    summary = (
+        df.groupby('zone', sort=False, observed=True)['risk_score']
+        .agg(['mean', 'size'])
+        .rename(columns={'mean': 'risk_score', 'size': 'pixels'})
+        .reset_index()
+    )
+    # AQI tam sayı; eksik skor 0 kabul edilir
+    summary['risk_score'] = summary['risk_score'].fillna(0.0).round(0).clip(lower=0)
+    summary['category'] = categorize(summary['risk_score'])
+    return summary
+
+
+def build_views(df):
+    """Grafik ve karar destek yüklerini aynı zon özetinden üretir: {'chart': ..., 'action': ...}."""
+    from modules.zones import load_zones
+    summary = zone_summary(df)
+    zones = load_zones()
+    labels_tr, labels_en = zones.labels('tr'), zones.labels('en')
+    names = summary['zone'].tolist()
+    scores = summary['risk_score'].tolist()
+    pixels = summary['pixels'].tolist()
+    categories = [AQI_CATEGORIES[i] for i in summary['category']]
+
+    # Grafik: zon adına göre sıralı
+    order = sorted(range(len(names)), key=names.__getitem__)
+    chart = {
+        "labels_tr": [labels_tr.get(names[i], names[i]) for i in order],
+        "labels_en": [labels_en.get(names[i], names[i]) for i in order],
+        "values": [scores[i] for i in order],
+        "colors": [categories[i]['color'] for i in order],
+        "title_tr": CHART_TITLE_TR,
+        "title_en": CHART_TITLE_EN,
+        "max_value": CHART_MAX_VALUE,
+    }
+    action = {"zones": [
+        {
+            "name_tr": labels_tr.get(name, name),
+            "name_en": labels_en.get(name, name),
+            "risk_score": score,
+            "level_tr": category['level_tr'],
+            "level_en": category['level_en'],
+            "actions_tr": category['actions_tr'],
+            "actions_en": category['actions_en'],
+            "pixels": count,
+        }
+        for name, score, category, count in zip(names, scores, categories, pixels)
+    ]}
+    metrics.inc('rows_processed_total', len(df), stage='derived_views')
+    return {'chart': chart, 'action': action}
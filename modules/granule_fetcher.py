@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from modules import metrics
+
+# 🛰️ TEMPO granül indirici: asyncio ile eşzamanlı indirme, ana makine başına kalıcı (keep-alive) bağlantı havuzu,
+# Range ile kaldığı yerden sürdürme ve içerik adresli, boyut sınırlı (LRU) yerel önbellek.
+# aiohttp/httpx yerine standart kütüphane: aktarım http.client ile iş parçacığı havuzunda, koordinasyon asyncio'da.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRANULE_CACHE_DIR = os.environ.get('STORMSENTINEL_GRANULE_CACHE', os.path.join(BASE_DIR, 'data', 'granules'))
+GRANULE_CACHE_MAX_BYTES = int(os.environ.get('STORMSENTINEL_GRANULE_CACHE_BYTES', 10 * 1024 ** 3))
+EARTHDATA_TOKEN = os.environ.get('EARTHDATA_TOKEN')
+
+DEFAULT_CONCURRENCY = 4
+CHUNK_SIZE = 1 << 20
+TIMEOUT = 60
+MAX_REDIRECTS = 5
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+INDEX_FILE = 'index.json'
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class GranuleCache:
+    """
+    İçerik adresli granül önbelleği: objects/<sha256[:2]>/<sha256> dosyaları ve URL → içerik hash'i dizini.
+    Aynı içerik farklı URL'lerden gelse de bir kez saklanır. Toplam boyut `max_bytes`'ı aşınca en uzun
+    süredir kullanılmayan nesneler silinir. Yarım kalan indirmeler partial/ altında sürdürülmek üzere bekler.
+    """
+
+    def __init__(self, root=GRANULE_CACHE_DIR, max_bytes=GRANULE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(root, INDEX_FILE)
+        self._index = {'urls': {}, 'objects': {}}  # url → sha256; sha256 → {size, used}
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'partial'), exist_ok=True)
+        if os.path.exists(self._index_path):
+            try:
+                with open(self._index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Granül önbellek dizini okunamadı, sıfırdan oluşturulacak: {e}")
+
+    def object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    @staticmethod
+    def object_digest(path):
+        """Önbellek nesnesinin içerik hash'i (nesneler sha256 ile adlandırılır, yeniden okuma gerekmez)."""
+        return os.path.basename(path)
+
+    def partial_path(self, url):
+        return os.path.join(self.root, 'partial', hashlib.sha256(url.encode('utf-8')).hexdigest() + '.part')
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(obj['size'] for obj in self._index['objects'].values())
+
+    def lookup(self, url):
+        """Önbellekteki yerel yol (yoksa None); kullanım zamanı güncellenir."""
+        with self._lock:
+            digest = self._index['urls'].get(url)
+            if digest is None:
+                return None
+            path = self.object_path(digest)
+            if digest not in self._index['objects'] or not os.path.exists(path):
+                self._forget(digest)
+                self._save()
+                return None
+            self._index['objects'][digest]['used'] = time.time()
+            self._save()
+            return path
+
+    def add(self, url, part_path):
+        """Tamamlanan indirmeyi içerik hash'iyle yerleştirir, dizini günceller ve gerekirse LRU tahliyesi yapar."""
+        digest = file_sha256(part_path)
+        path = self.object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(part_path)
+        else:
+            os.replace(part_path, path)
+
+        with self._lock:
+            self._index['urls'][url] = digest
+            self._index['objects'][digest] = {'size': os.path.getsize(path), 'used': time.time()}
+            self._evict(keep=digest)
+            self._save()
+        return path
+
+    def _forget(self, digest):
+        self._index['objects'].pop(digest, None)
+        self._index['urls'] = {u: d for u, d in self._index['urls'].items() if d != digest}
+
+    def _evict(self, keep=None):
+        total = sum(obj['size'] for obj in self._index['objects'].values())
+        for digest, obj in sorted(self._index['objects'].items(), key=lambda item: item[1]['used']):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(self.object_path(digest))
+            except FileNotFoundError:
+                pass
+            self._forget(digest)
+            total -= obj['size']
+            metrics.inc('granule_cache_evictions_total')
+
+    def _save(self):
+        tmp_path = f'{self._index_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+
+class ConnectionPool:
+    """(şema, ana makine) başına boşta bekleyen kalıcı HTTP bağlantıları; yanıtı tam okunan bağlantı yeniden kullanılır."""
+
+    def __init__(self, max_idle_per_host=DEFAULT_CONCURRENCY, timeout=TIMEOUT):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self.opened = 0
+
+    def acquire(self, scheme, netloc):
+        key = (scheme, netloc)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return key, idle.pop()
+            self.opened += 1
+        metrics.inc('granule_connections_opened_total', host=netloc)
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return key, cls(netloc, timeout=self.timeout)
+
+    def release(self, key, conn, reusable=True):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if reusable and len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+
+class GranuleFetcher:
+    """
+    Granülleri eşzamanlı indirir (en fazla `concurrency` aktarım). Önbellekte olan URL ağa hiç gitmez;
+    aynı URL için eşzamanlı istekler tek indirmeyi paylaşır.
+    """
+
+    def __init__(self, cache=None, concurrency=DEFAULT_CONCURRENCY, token=EARTHDATA_TOKEN, timeout=TIMEOUT):
+        self.cache = cache or GranuleCache()
+        self.concurrency = concurrency
+        self.token = token
+        self.pool = ConnectionPool(max_idle_per_host=concurrency, timeout=timeout)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='granule-fetch')
+        self._inflight = {}
+        self._semaphore = None
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    async def fetch(self, url):
+        """URL'nin yerel önbellek yolunu döndürür; gerekirse indirir."""
+        path = self.cache.lookup(url)
+        if path:
+            metrics.inc('cache_hits_total', cache='granule')
+            return path
+        metrics.inc('cache_misses_total', cache='granule')
+
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_remote(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await task
+
+    async def fetch_many(self, urls):
+        """Tüm URL'leri paralel indirir; başarısız olanlar için None döner."""
+        results = await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+        paths = []
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                print(f"❌ Granül indirilemedi ({url}): {result}")
+                result = None
+            paths.append(result)
+        return paths
+
+    async def _fetch_remote(self, url):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        part_path = self.cache.partial_path(url)
+
+        async with self._semaphore:
+            # Süre ve boyut granülün tamamı içindir: kesilip sürdürülen denemeler ve aradaki beklemeler dahil
+            start = time.perf_counter()
+            for attempt in range(1, MAX_RETRIES + 1):
+                try:
+                    await loop.run_in_executor(self._executor, self._download, url, part_path)
+                    break
+                except (OSError, http.client.HTTPException) as e:
+                    if attempt == MAX_RETRIES:
+                        raise
+                    print(f"⚠️ İndirme kesildi ({url}), yeniden deneniyor ({attempt}/{MAX_RETRIES - 1}): {e}")
+                    await asyncio.sleep(RETRY_BACKOFF * attempt)
+            path = await loop.run_in_executor(self._executor, self.cache.add, url, part_path)
+
+        seconds = time.perf_counter() - start
+        metrics.observe('granule_download_seconds', seconds)
+        print(f"✅ Granül indirildi: {url} ({os.path.getsize(path) / 1e6:.1f} MB, {seconds:.2f} sn)")
+        return path
+
+    def _download(self, url, part_path):
+        """
+        `url`'yi `part_path`'e indirir (iş parçacığında çalışır). Dosya kısmen varsa Range ile kaldığı yerden
+        sürdürülür; sunucu Range desteklemiyorsa baştan yazılır. Bu çağrıda alınan bayt sayısını döndürür.
+        """
+        origin = urlsplit(url).netloc
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {'Accept-Encoding': 'identity'}
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+            if self.token and parts.netloc == origin:
+                headers['Authorization'] = f'Bearer {self.token}'
+
+            key, conn = self.pool.acquire(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', parts.path + (f'?{parts.query}' if parts.query else ''), headers=headers)
+                resp = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                self.pool.release(key, conn, reusable=False)
+                raise
+
+            if resp.status not in (200, 206):
+                resp.read()
+                self.pool.release(key, conn, reusable=not resp.will_close)
+                if resp.status in REDIRECT_STATUSES:
+                    url = urljoin(url, resp.getheader('Location'))
+                    continue
+                if resp.status == 416:
+                    # Kısmi dosya sunucudaki içerikle uyuşmuyor: baştan indir
+                    os.remove(part_path)
+                    continue
+                raise http.client.HTTPException(f"HTTP {resp.status}: {url}")
+
+            if resp.status == 206:
+                match = CONTENT_RANGE_PATTERN.match(resp.getheader('Content-Range', ''))
+                if not match or int(match.group(1)) != offset:
+                    resp.read()
+                    self.pool.release(key, conn, reusable=False)
+                    os.remove(part_path)
+                    continue
+                expected = None if match.group(3) == '*' else int(match.group(3))
+            else:
+                expected = resp.length
+
+            received = 0
+            try:
+                with open(part_path, 'ab' if resp.status == 206 else 'wb') as f:
+                    for chunk in iter(lambda: resp.read(CHUNK_SIZE), b''):
+                        f.write(chunk)
+                        received += len(chunk)
+                metrics.inc('granule_bytes_downloaded_total', received)
+                # http.client erken kapanan bağlantıda sessizce b'' döndürür: eksik içerik yeniden denenmeli
+                size = os.path.getsize(part_path)
+                if resp.length or (expected is not None and size != expected):
+                    raise http.client.IncompleteRead(b'', resp.length or expected - size)
+            except (OSError, http.client.HTTPException):
+                self.pool.release(key, conn, reusable=False)
+                raise
+            self.pool.release(key, conn, reusable=not resp.will_close)
+            return received
+
+        raise http.client.HTTPException(f"Çok fazla yönlendirme veya yeniden başlatma: {url}")
+
+
+def fetch_granules(urls, cache_dir=None, max_bytes=None, concurrency=DEFAULT_CONCURRENCY, token=EARTHDATA_TOKEN):
+    """Granülleri paralel indirip (veya önbellekten alıp) yerel yollarını sırayla döndürür; başarısızlar None."""
+    cache = GranuleCache(cache_dir or GRANULE_CACHE_DIR, GRANULE_CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+    fetcher = GranuleFetcher(cache, concurrency=concurrency, token=token)
+    try:
+        return asyncio.run(fetcher.fetch_many(list(urls)))
+    finally:
+        fetcher.close()
+
+
+metrics.describe('granule_bytes_downloaded_total', "Ağdan indirilen granül baytı.")
+metrics.describe('granule_connections_opened_total', "Açılan yeni HTTP bağlantıları (yeniden kullanılanlar hariç).")
+metrics.describe('granule_cache_evictions_total', "Boyut sınırı nedeniyle silinen önbellek nesneleri.")
+metrics.describe('granule_download_seconds', "Granül indirme süresi (saniye).")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TEMPO granüllerini yerel önbelleğe paralel indirir.")
+    parser.add_argument('urls', nargs='+', help="Granül URL'leri")
+    parser.add_argument('--cache', default=GRANULE_CACHE_DIR, help="Önbellek klasörü")
+    parser.add_argument('--max-bytes', type=int, default=GRANULE_CACHE_MAX_BYTES, help="Önbellek boyut sınırı (bayt)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Eşzamanlı indirme sayısı")
+    args = parser.parse_args()
+    for url, path in zip(args.urls, fetch_granules(args.urls, args.cache, args.max_bytes, args.concurrency)):
+        print(f"{url} → {path}")
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modules import metrics
+from modules.zones import grid_axis, load_zones
+
+# 🧭 TEMPO L3 granülleri aynı sabit enlem/boylam ızgarasını paylaşır; ızgara başına zon raster'ı ve
+# zon içi hücre düzeni bir kez hesaplanıp diske yazılır, sonraki granüller yalnızca NO2 değerlerini toplar.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRID_CACHE_DIR = os.environ.get('STORMSENTINEL_GRID_CACHE', os.path.join(BASE_DIR, 'data', 'grid_cache'))
+MAX_MEMORY_ENTRIES = 4
+COORD_DECIMALS = 4  # tempo_reader çıktısıyla aynı yuvarlama
+META_FILE = 'meta.json'
+ARRAYS = ('lat', 'lon', 'zone', 'cells')
+
+
+def grid_key(lat, lon, zones):
+    """Ham enlem/boylam dizileri ve zon tanımlarının özetinden ızgara anahtarı."""
+    h = hashlib.sha256()
+    for axis in (lat, lon):
+        axis = np.ascontiguousarray(axis)
+        h.update(f'{axis.dtype.str}{axis.shape}'.encode('utf-8'))
+        h.update(axis.tobytes())
+    h.update(zones.fingerprint.encode('utf-8'))
+    return h.hexdigest()[:24]
+
+
+class GridGeometry:
+    """
+    Bir ızgaranın yuvarlanmış eksenleri, hücre başına zon kodu (enlem × boylam) ve zon içi hücrelerin
+    enlem öncelikli düz indeksleri (`cells`). `row_offsets[r]`, r. satırın `cells` içindeki başlangıcıdır.
+    """
+
+    def __init__(self, key, lat, lon, zone, cells, names):
+        self.key = key
+        self.lat, self.lon = lat, lon
+        self.zone = zone
+        self.cells = cells
+        self.names = names
+        self.row_offsets = np.searchsorted(cells, np.arange(len(lat) + 1, dtype=np.int64) * len(lon))
+
+    @classmethod
+    def build(cls, lat, lon, zones, key=None):
+        lat_r = np.round(np.asarray(lat, dtype=float), COORD_DECIMALS)
+        lon_r = np.round(np.asarray(lon, dtype=float), COORD_DECIMALS)
+        lat_axis, lat_idx = grid_axis(lat_r)
+        lon_axis, lon_idx = grid_axis(lon_r)
+        zone = zones.raster(lat_axis, lon_axis)[lat_idx[:, None], lon_idx[None, :]]
+        cells = np.flatnonzero(zone.ravel() != zones.outside_code)
+        cells = cells.astype(np.int32 if zone.size <= np.iinfo(np.int32).max else np.int64)
+        return cls(key or grid_key(lat, lon, zones), lat_r, lon_r, zone, cells, zones.names)
+
+    def save(self, cache_dir):
+        """Geçici klasöre yazar ve tek bir rename ile yayımlar (eşzamanlı işçiler yarım önbellek görmez)."""
+        os.makedirs(cache_dir, exist_ok=True)
+        final = os.path.join(cache_dir, self.key)
+        tmp = tempfile.mkdtemp(prefix=f'.{self.key}.', dir=cache_dir)
+        try:
+            for name in ARRAYS:
+                np.save(os.path.join(tmp, f'{name}.npy'), getattr(self, name))
+            with open(os.path.join(tmp, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'key': self.key, 'zones': list(self.names), 'shape': list(self.zone.shape)}, f)
+            os.replace(tmp, final)
+        except OSError:
+            # Başka bir işçi aynı anahtarı önce yayımladı
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.exists(os.path.join(final, META_FILE)):
+                raise
+        metrics.inc('bytes_written_total', metrics.path_size(final), format='grid_cache')
+        return final
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+        metrics.inc('bytes_read_total', metrics.path_size(path), format='grid_cache')
+        return cls(meta['key'], names=np.array(meta['zones'], dtype=object), **arrays)
+
+    def subgrid(self, lat_sl, lon_sl):
+        """
+        [lat_sl, lon_sl] penceresinin geometrisi; zon raster'ı yeniden hesaplanmaz, tam ızgaranınkinden kesilir.
+        Bellekte kalır (diske yazılmaz): anlık bbox sorguları önbellek klasörünü büyütmez.
+        """
+        r0, r1, _ = lat_sl.indices(len(self.lat))
+        c0, c1, _ = lon_sl.indices(len(self.lon))
+        nlon = len(self.lon)
+        cells = np.asarray(self.cells[self.row_offsets[r0]:self.row_offsets[r1]])
+        rows, cols = np.divmod(cells, nlon)
+        keep = (cols >= c0) & (cols < c1)
+        cells = ((rows[keep] - r0) * (c1 - c0) + (cols[keep] - c0)).astype(self.cells.dtype)
+        return GridGeometry(f'{self.key}[{r0}:{r1},{c0}:{c1}]', self.lat[r0:r1], self.lon[c0:c1],
+                            np.ascontiguousarray(self.zone[r0:r1, c0:c1]), cells, self.names)
+
+    def gather(self, block, r0):
+        """
+        `block` = ızgaranın [r0, r0 + len(block)) satırları. Yalnızca zon içi hücrelerin NO2 değerleri toplanır;
+        sonlu olanlar latitude/longitude/no2/zone DataFrame'i olarak (enlem öncelikli sırayla) döner.
+        """
+        nlon = len(self.lon)
+        cells = self.cells[self.row_offsets[r0]:self.row_offsets[r0 + len(block)]]
+        values = np.ascontiguousarray(block).ravel()[cells - r0 * nlon]
+        finite = np.isfinite(values)
+        cells = cells[finite]
+        rows, cols = np.divmod(cells, nlon)
+        return pd.DataFrame({
+            'latitude': self.lat[rows],
+            'longitude': self.lon[cols],
+            'no2': np.round(values[finite].astype(float), COORD_DECIMALS),
+            'zone': self.names[self.zone.ravel()[cells]],
+        })
+
+
+_lock = threading.Lock()
+_memory = OrderedDict()  # key → GridGeometry
+
+
+def load_grid_geometry(lat, lon, zones=None, cache_dir=None):
+    """
+    Izgara geometrisini sırasıyla bellekten, diskten veya (ilk kez görülen ızgarada) hesaplayarak döndürür.
+    Zon tanımları değişirse anahtar da değişir; eski önbellek kullanılmaz.
+    """
+    zones = zones or load_zones()
+    cache_dir = cache_dir or GRID_CACHE_DIR
+    key = grid_key(lat, lon, zones)
+
+    with _lock:
+        geometry = _memory.get(key)
+        if geometry is not None:
+            _memory.move_to_end(key)
+            metrics.inc('cache_hits_total', cache='grid_geometry', tier='memory')
+            return geometry
+
+    path = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(path, META_FILE)):
+        geometry = GridGeometry.load(path)
+        metrics.inc('cache_hits_total', cache='grid_geometry', tier='disk')
+    else:
+        geometry = GridGeometry.build(lat, lon, zones, key=key)
+        metrics.inc('cache_misses_total', cache='grid_geometry')
+        try:
+            geometry.save(cache_dir)
+        except OSError as e:
+            print(f"⚠️ Izgara önbelleği yazılamadı ({cache_dir}): {e}")
+
+    with _lock:
+        _memory[key] = geometry
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return geometry
+
+
+def load_region_geometry(lat, lon, lat_sl, lon_sl, zones=None, cache_dir=None):
+    """
+    Tam ızgaranın [lat_sl, lon_sl] penceresi (ROI) için geometri. Tam ızgara geometrisi her zamanki gibi
+    önbellekten gelir; pencere ondan kesilir ve yalnızca bellekteki LRU'da tutulur.
+    """
+    full = load_grid_geometry(lat, lon, zones=zones, cache_dir=cache_dir)
+    r0, r1, _ = lat_sl.indices(len(lat))
+    c0, c1, _ = lon_sl.indices(len(lon))
+    if (r0, r1, c0, c1) == (0, len(lat), 0, len(lon)):
+        return full
+    key = f'{full.key}[{r0}:{r1},{c0}:{c1}]'
+
+    with _lock:
+        geometry = _memory.get(key)
+        if geometry is not None:
+            _memory.move_to_end(key)
+            metrics.inc('cache_hits_total', cache='grid_geometry', tier='memory')
+            return geometry
+
+    geometry = full.subgrid(slice(r0, r1), slice(c0, c1))
+    with _lock:
+        _memory[key] = geometry
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return geometry
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules import metrics
+from modules.storage import read_table, write_table, table_path, atomic_output
+
+# 🗺️ Yakınlaştırma seviyesine göre hücre boyutu (derece): z2 → 4°, her seviyede yarıya iner
+MIN_ZOOM = 2
+MAX_ZOOM = 9
+BASE_CELL_DEG = 4.0
+# Tek yanıtta gönderilecek en fazla hücre; aşılırsa daha kaba seviyeye inilir
+MAX_FEATURES = 5000
+GRID_INDEX_FILE = 'levels.json'
+
+
+def cell_size(zoom):
+    return BASE_CELL_DEG / 2 ** (zoom - MIN_ZOOM)
+
+
+def aggregate_level(df, zoom):
+    """Risk tablosunu verilen seviyenin hücrelerine toplar (ortalama NO2/AQI, en yüksek AQI, piksel sayısı)."""
+    size = cell_size(zoom)
+    binned = pd.DataFrame({
+        'row': np.floor(df['latitude'].to_numpy() / size).astype(np.int64),
+        'col': np.floor(df['longitude'].to_numpy() / size).astype(np.int64),
+        'no2': df['NO2_column'].to_numpy(),
+        'aqi': df['aqi'].to_numpy(),
+    })
+    cells = binned.groupby(['row', 'col'], sort=False).agg(
+        no2_mean=('no2', 'mean'), aqi_mean=('aqi', 'mean'), aqi_max=('aqi', 'max'), pixels=('aqi', 'size')
+    ).reset_index()
+    cells['aqi_mean'] = cells['aqi_mean'].round(0)
+    return cells
+
+
+def build_grid_levels(df):
+    return {zoom: aggregate_level(df, zoom) for zoom in range(MIN_ZOOM, MAX_ZOOM + 1)}
+
+
+@metrics.instrumented
+def generate_grid(csv_path, output_dir, df=None):
+    """
+    Risk tablosundan çok çözünürlüklü hücre piramidini üretir ve `output_dir` altına yazar.
+    Seviye tabloları storage formatında, dizin dosyası (levels.json) en son yazılır.
+    """
+    try:
+        if df is None:
+            df = read_table(csv_path, columns=['latitude', 'longitude', 'NO2_column', 'aqi'])
+        os.makedirs(output_dir, exist_ok=True)
+
+        index = {}
+        for zoom, cells in build_grid_levels(df).items():
+            path = write_table(cells, table_path(os.path.join(output_dir, f'z{zoom}.csv')))
+            index[zoom] = {'file': os.path.basename(path), 'cells': len(cells)}
+
+        with atomic_output(os.path.join(output_dir, GRID_INDEX_FILE)) as tmp_path, \
+                open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'cell_deg': BASE_CELL_DEG, 'min_zoom': MIN_ZOOM, 'levels': index}, f)
+        print(f"✅ Hücre piramidi oluşturuldu ({MIN_ZOOM}-{MAX_ZOOM}) → {output_dir}")
+    except Exception as e:
+        print(f"❌ Hücre piramidi oluşturma hatası: {e}")
+
+
+class GridStore:
+    """
+    Hücre piramidini bellekte tutar; dizin dosyası değiştiğinde (yeni veri akışı) yeniden yükler.
+    """
+
+    def __init__(self, grid_dir):
+        self.grid_dir = grid_dir
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._levels = {}
+
+    def levels(self):
+        index_path = os.path.join(self.grid_dir, GRID_INDEX_FILE)
+        if not os.path.exists(index_path):
+            return {}
+        stamp = os.path.getmtime(index_path)
+        with self._lock:
+            metrics.inc('cache_hits_total' if stamp == self._stamp else 'cache_misses_total', cache='grid')
+            if stamp != self._stamp:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                self._levels = {
+                    int(zoom): read_table(os.path.join(self.grid_dir, entry['file']))
+                    for zoom, entry in index['levels'].items()
+                }
+                self._stamp = stamp
+            return self._levels
+
+    def query(self, bbox, zoom, max_features=MAX_FEATURES):
+        """bbox (batı, güney, doğu, kuzey) içindeki hücreleri GeoJSON FeatureCollection olarak döndürür."""
+        levels = self.levels()
+        if not levels:
+            return None
+
+        west, south, east, north = bbox
+        zoom = min(max(int(zoom), min(levels)), max(levels))
+        while True:
+            cells, size = levels[zoom], cell_size(zoom)
+            lat0 = cells['row'].to_numpy() * size
+            lon0 = cells['col'].to_numpy() * size
+            inside = (lat0 + size >= south) & (lat0 <= north) & (lon0 + size >= west) & (lon0 <= east)
+            if inside.sum() <= max_features or zoom == min(levels):
+                break
+            zoom -= 1
+
+        selected = cells[inside].head(max_features)
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [[[lon, lat], [lon + size, lat], [lon + size, lat + size],
+                                     [lon, lat + size], [lon, lat]]],
+                },
+                'properties': {'aqi': float(aqi), 'aqi_max': int(aqi_max), 'no2': float(no2), 'pixels': int(pixels)},
+            }
+            for lat, lon, aqi, aqi_max, no2, pixels in zip(
+                lat0[inside][:max_features], lon0[inside][:max_features], selected['aqi_mean'],
+                selected['aqi_max'], selected['no2_mean'], selected['pixels'])
+        ]
+        return {'type': 'FeatureCollection', 'zoom': zoom, 'cell_deg': size, 'features': features}
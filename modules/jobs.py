@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from modules import metrics
+from modules.storage import atomic_output
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 🧵 Bellekte tutulacak en fazla tamamlanmış iş kaydı
+MAX_FINISHED_JOBS = 100
+# 🔒 Kilit beklerken yoklama aralığı (sn); Windows'ta kilitlenen bayt, sahip kimliğinin okunabilmesi için dosya başından uzakta
+LOCK_POLL_SECONDS = 0.2
+LOCK_OFFSET = 1 << 20
+# Kilidi kaybeden işçi, sahibin iş kaydını bu süre boyunca yoklar (sahip kaydı kilitten önce yazar)
+ATTACH_POLL_SECONDS = 0.02
+ATTACH_TIMEOUT = 5.0
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class FileLock:
+    """
+    Süreçler arası (ör. gunicorn işçileri arasında) özel kilit. İşletim sistemi kilidi olduğu için süreç
+    çökerse kendiliğinden bırakılır. Kilidi alan, sahip kimliğini (iş kimliği) dosyaya yazar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def _try_lock(self, f):
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(LOCK_OFFSET)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, owner='', blocking=False):
+        """Kilidi almayı dener (`blocking` ise alınana kadar bekler); alındıysa True döndürür."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, 'a+', encoding='utf-8')
+        while not self._try_lock(f):
+            if not blocking:
+                f.close()
+                return False
+            time.sleep(LOCK_POLL_SECONDS)
+        f.seek(0)
+        f.truncate()
+        f.write(owner)
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is None:
+            self._file.seek(LOCK_OFFSET)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()  # flock dosya kapanınca bırakılır
+        self._file = None
+
+    def owner(self):
+        """Kilidi son alan sahibin kimliği (kilit dosyası yoksa None)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+
+class JobRunner:
+    """
+    Uzun süren işleri arka plan iş parçacığında çalıştırır.
+    Her veri seti için aynı anda tek iş çalışır (single-flight): çalışan bir iş varken
+    gelen istekler yeni iş başlatmaz, mevcut işe bağlanır.
+    `state_dir` verilirse (çok işçili sunucu) iş kayıtları JSON olarak paylaşılır ve veri seti başına
+    dosya kilidi tutulur: kilidi alan işçi işi çalıştırır, diğerleri onun iş kaydına bağlanır.
+    """
+
+    def __init__(self, max_finished=MAX_FINISHED_JOBS, state_dir=None):
+        self._lock = threading.Lock()
+        # submit'leri sıralar; kilit yoklanırken get/_update (self._lock) engellenmez
+        self._submit_lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}  # dataset → job_id
+        self._finished = deque()
+        self._max_finished = max_finished
+        self._state_dir = state_dir
+
+    def submit(self, dataset, target):
+        """
+        `target(on_stage)` fonksiyonunu arka planda başlatır.
+        (iş anlık görüntüsü, mevcut işe bağlanıldıysa True) döndürür.
+        """
+        with self._submit_lock:
+            with self._lock:
+                active_id = self._active.get(dataset)
+                if active_id:
+                    metrics.inc('jobs_total', dataset=dataset, status='attached')
+                    return dict(self._jobs[active_id]), True
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'dataset': dataset,
+                'status': 'queued',
+                'stage': None,
+                'progress': 0.0,
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+                'result': None,
+                'error': None,
+            }
+            file_lock = None
+            if self._state_dir:
+                # Kayıt, sahip kimliği kilit dosyasında görünmeden önce yazılır: kaybeden işçi her zaman okuyabilir
+                self._save(job)
+                try:
+                    file_lock, shared = self._acquire_or_attach(dataset, job['id'])
+                except RuntimeError:
+                    os.remove(self._state_path(job['id']))
+                    raise
+                if file_lock is None:
+                    os.remove(self._state_path(job['id']))
+                    metrics.inc('jobs_total', dataset=dataset, status='attached')
+                    return shared, True
+
+            with self._lock:
+                self._jobs[job['id']] = job
+                self._active[dataset] = job['id']
+                snapshot = dict(job)
+
+        threading.Thread(target=self._run, args=(job, target, file_lock), daemon=True).start()
+        return snapshot, False
+
+    def _acquire_or_attach(self, dataset, job_id):
+        """
+        Veri seti kilidini almaya çalışır: (kilit, None) veya başka işçide çalışan iş için (None, kayıt) döndürür.
+        Sahip kilidi alıp kimliğini yazana kadar kilit dosyasında eski/boş kimlik görülebilir; bu durumda
+        kısa süre yoklanır. Kilit bu arada bırakılırsa yeniden alınmaya çalışılır.
+        """
+        file_lock = FileLock(os.path.join(self._state_dir, f'{dataset}.lock'))
+        deadline = time.monotonic() + ATTACH_TIMEOUT
+        while True:
+            if file_lock.acquire(owner=job_id):
+                return file_lock, None
+            shared = self._load(file_lock.owner())
+            if shared and shared['status'] in ACTIVE_STATUSES:
+                return None, shared
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Veri seti kilidi ({dataset}) tutuluyor ama sahibinin iş kaydı okunamadı.")
+            time.sleep(ATTACH_POLL_SECONDS)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        return self._load(job_id)
+
+    def _state_path(self, job_id):
+        return os.path.join(self._state_dir, f'{job_id}.json')
+
+    def _save(self, job):
+        # Çağıran self._lock'u (veya henüz paylaşılmamış iş için self._submit_lock'u) tutar
+        if self._state_dir:
+            with atomic_output(self._state_path(job['id'])) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(job, f)
+
+    def _load(self, job_id):
+        """Paylaşılan iş kaydını (başka bir işçinin işi olabilir) okur; yoksa None."""
+        if not self._state_dir or not job_id or not job_id.isalnum():
+            return None
+        try:
+            with open(self._state_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def active(self, dataset):
+        with self._lock:
+            job_id = self._active.get(dataset)
+            return dict(self._jobs[job_id]) if job_id else None
+
+    def _update(self, job, **fields):
+        with self._lock:
+            job.update(fields)
+            self._save(job)
+
+    def _run(self, job, target, file_lock=None):
+        self._update(job, status='running', started=time.time())
+
+        def on_stage(name, index=None, total=None):
+            progress = round(index / total, 2) if index is not None and total else job['progress']
+            self._update(job, stage=name, progress=progress)
+
+        try:
+            result = target(on_stage)
+            self._update(job, status='done', stage=None, progress=1.0, result=result)
+        except Exception as e:
+            print(f"❌ Arka plan işi başarısız ({job['dataset']}): {e}")
+            self._update(job, status='failed', error=str(e))
+        finally:
+            metrics.inc('jobs_total', dataset=job['dataset'], status=job['status'])
+            with self._lock:
+                job['finished'] = time.time()
+                self._save(job)
+                if self._active.get(job['dataset']) == job['id']:
+                    del self._active[job['dataset']]
+                self._finished.append(job['id'])
+                while len(self._finished) > self._max_finished:
+                    expired = self._finished.popleft()
+                    self._jobs.pop(expired, None)
+                    if self._state_dir and os.path.exists(self._state_path(expired)):
+                        os.remove(self._state_path(expired))
+            if file_lock is not None:
+                file_lock.release()
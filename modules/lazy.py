@@ -0,0 +1,42 @@
+import importlib
+import threading
+import time
+
+from modules import metrics
+
+
+class LazyModule:
+    """
+    İlk öznitelik erişiminde içe aktarılan modül vekili. Web sunucusu pandas/numpy/h5py/folium gibi ağır
+    kütüphaneleri yalnızca onlara ihtiyaç duyan rota ilk çağrıldığında yükler; şablon rotaları hafif kalır.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    metrics.observe('lazy_import_seconds', time.perf_counter() - start, module=self._name)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} ({'yüklendi' if self.loaded else 'yüklenmedi'})>"
+
+
+def lazy_import(name):
+    """`import name` yerine kullanılır; modül ilk öznitelik erişiminde (thread-safe) yüklenir."""
+    return LazyModule(name)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+
+from modules.storage import atomic_output
+
+# 🧾 Hash okuma blok boyutu
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def _iter_files(path):
+    """Dosya için kendisini, klasör (ör. .npyd tablo) için içindeki dosyaları sıralı döndürür."""
+    if os.path.isdir(path):
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                yield os.path.join(root, name)
+    else:
+        yield path
+
+
+def _stat_key(path):
+    """Boyut ve mtime özeti; değişmediyse içerik hash'i yeniden hesaplanmaz."""
+    stats = [os.stat(p) for p in _iter_files(path)]
+    return [sum(s.st_size for s in stats), max((s.st_mtime_ns for s in stats), default=0), len(stats)]
+
+
+def content_hash(path):
+    h = hashlib.sha256()
+    for p in _iter_files(path):
+        h.update(os.path.relpath(p, path).encode('utf-8'))
+        with open(p, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                h.update(block)
+    return h.hexdigest()
+
+
+class Manifest:
+    """
+    Girdi dosyalarının içerik hash'lerini ve her aşamanın hangi girdiden üretildiğini JSON olarak saklar.
+    Girdi ve çıktı değişmediyse aşama atlanabilir; tekrar eden yenilemeler yalnızca stat + hash karşılaştırmasıdır.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {'inputs': {}, 'stages': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Manifest okunamadı, sıfırdan oluşturulacak: {e}")
+
+    def fingerprint(self, path):
+        """Girdinin içerik hash'i; stat bilgisi değişmediyse kayıtlı hash kullanılır."""
+        stat_key = _stat_key(path)
+        entry = self.data['inputs'].get(path)
+        if entry and entry.get('stat') == stat_key:
+            return entry['hash']
+        digest = content_hash(path)
+        self.data['inputs'][path] = {'stat': stat_key, 'hash': digest}
+        return digest
+
+    def is_fresh(self, stage, input_hash, output):
+        entry = self.data['stages'].get(stage)
+        return bool(entry) and entry.get('input') == input_hash and entry.get('output') == output \
+            and os.path.exists(output)
+
+    def record(self, stage, input_hash, output):
+        self.data['stages'][stage] = {'input': input_hash, 'output': output}
+
+    def save(self):
+        with atomic_output(self.path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
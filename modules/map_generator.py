@@ -1,9 +1,14 @@
 import folium
-import pandas as pd
 
-def generate_map(csv_path, output_html):
+from modules import metrics
+from modules.storage import read_table, atomic_output
+
+@metrics.instrumented
+def generate_map(csv_path, output_html, df=None):
+    # `df` verilirse CSV okunmaz, bellekteki risk tablosu kullanılır
     try:
-        df = pd.read_csv(csv_path)
+        if df is None:
+            df = read_table(csv_path)
         m = folium.Map(location=[39.0, -95.0], zoom_start=4, tiles='CartoDB positron')
 
         color_map = {
@@ -23,7 +28,8 @@ def generate_map(csv_path, output_html):
                 popup=f"AQI: {row['aqi']}<br>Risk: {row['risk_level']}"
             ).add_to(m)
 
-        m.save(output_html)
+        with atomic_output(output_html) as tmp_path:
+            m.save(tmp_path)
         print(f"✅ Harita oluşturuldu: {output_html}")
     except Exception as e:
         print(f"❌ Harita oluşturma hatası: {e}")
\ No newline at end of file
@@ -0,0 +1,213 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 📊 Ölçümler STORMSENTINEL_METRICS=1 ile açılır; kapalıyken her çağrı tek bir bool kontrolüdür
+ENABLED = os.environ.get('STORMSENTINEL_METRICS', '0') == '1'
+PREFIX = 'stormsentinel_'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# 🧮 Çok işçili sunucu (gunicorn): STORMSENTINEL_METRICS_DIR tanımlıysa her süreç ölçümlerini bu klasörde kendi
+# dosyasına yazar (en fazla FLUSH_SECONDS aralıkla) ve /metrics tüm süreçlerin dosyalarını toplayarak sunar;
+# böylece hangi işçiye düşerse düşsün sayaçlar sıçramaz/sıfırlanmaz. Klasör sunucu açılışında temizlenmelidir.
+METRICS_DIR = os.environ.get('STORMSENTINEL_METRICS_DIR')
+FLUSH_SECONDS = 1.0
+
+_lock = threading.Lock()
+_counters = {}    # (ad, etiketler) → değer
+_histograms = {}  # (ad, etiketler) → [kova sayaçları, toplam, adet]
+_help = {}
+_dirty = threading.Event()
+_flusher = None
+_process_file = None
+
+
+def _key(name, labels):
+    return PREFIX + name, tuple(sorted(labels.items()))
+
+
+def describe(name, text):
+    _help[PREFIX + name] = text
+
+
+def inc(name, amount=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _mark_dirty()
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * len(DEFAULT_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                hist[0][i] += 1
+        hist[1] += value
+        hist[2] += 1
+    _mark_dirty()
+
+
+def _snapshot():
+    with _lock:
+        counters = list(_counters.items())
+        histograms = [(k, (list(v[0]), v[1], v[2])) for k, v in _histograms.items()]
+    return counters, histograms
+
+
+def flush():
+    """Bu sürecin ölçümlerini METRICS_DIR'deki kendi dosyasına yazar (geçici dosya + rename)."""
+    global _process_file
+    if not METRICS_DIR:
+        return
+    _dirty.clear()
+    counters, histograms = _snapshot()
+    if _process_file is None:
+        # pid tekrar kullanılabilir; açılış zamanı eklenerek her süreç ayrı dosyaya yazar
+        _process_file = os.path.join(METRICS_DIR, f'{os.getpid()}.{time.time_ns()}.json')
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    tmp_path = f'{_process_file}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'counters': [[n, list(map(list, l)), v] for (n, l), v in counters],
+                   'histograms': [[n, list(map(list, l)), list(h)] for (n, l), h in histograms]}, f)
+    os.replace(tmp_path, _process_file)
+
+
+def _flush_loop():
+    while True:
+        _dirty.wait()
+        time.sleep(FLUSH_SECONDS)
+        try:
+            flush()
+        except OSError as e:
+            print(f"⚠️ Ölçümler yazılamadı ({METRICS_DIR}): {e}")
+
+
+def _mark_dirty():
+    global _flusher
+    if not METRICS_DIR:
+        return
+    _dirty.set()
+    if _flusher is None:
+        with _lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True)
+                _flusher.start()
+                atexit.register(flush)
+
+
+def _collect():
+    """Ölçüm dosyalarının toplamı (METRICS_DIR yoksa yalnızca bu süreç)."""
+    if not METRICS_DIR:
+        return _snapshot()
+    flush()
+    counters, histograms = {}, {}
+    for entry in os.listdir(METRICS_DIR):
+        if not entry.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, entry), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, (buckets, total, count) in data['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            acc = histograms.setdefault(key, ([0] * len(buckets), 0.0, 0))
+            histograms[key] = ([a + b for a, b in zip(acc[0], buckets)], acc[1] + total, acc[2] + count)
+    return list(counters.items()), list(histograms.items())
+
+
+@contextmanager
+def timed(name, **labels):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def instrumented(function):
+    """Fonksiyon süresini stormsentinel_function_seconds{function=...} histogramına yazar."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return function(*args, **kwargs)
+        with timed('function_seconds', function=function.__name__):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def path_size(path):
+    """Dosya veya klasör (ör. .npyd tablo) boyutu; ölçüm kapalıysa 0 (stat yapılmaz)."""
+    if not ENABLED or not path or not os.path.exists(path):
+        return 0
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+
+def render():
+    """Prometheus metin biçiminde tüm ölçümler (METRICS_DIR tanımlıysa tüm süreçlerin toplamı)."""
+    counters, histograms = _collect()
+    counters, histograms = sorted(counters), sorted(histograms)
+
+    lines, seen = [], set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name, 'counter')
+        lines.append(f"{name}{_labels(labels)} {value}")
+    for (name, labels), (buckets, total, count) in histograms:
+        header(name, 'histogram')
+        for bound, n in zip(DEFAULT_BUCKETS, buckets):
+            lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {n}")
+        lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {total}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+    return '\n'.join(lines) + '\n'
+
+
+describe('function_seconds', "Modül giriş fonksiyonlarının süresi (saniye).")
+describe('pipeline_stage_seconds', "Veri akışı aşama süreleri (saniye).")
+describe('rows_processed_total', "İşlenen satır (piksel) sayısı.")
+describe('bytes_read_total', "Okunan bayt.")
+describe('bytes_written_total', "Yazılan bayt.")
+describe('cache_hits_total', "Önbellek isabetleri.")
+describe('cache_misses_total', "Önbellek ıskaları.")
+describe('http_request_seconds', "Flask rota başına istek süresi (saniye).")
+describe('jobs_total', "Arka plan işleri (duruma göre).")
+describe('lazy_import_seconds', "Tembel yüklenen modüllerin ilk içe aktarma süresi (saniye).")
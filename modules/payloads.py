@@ -0,0 +1,49 @@
+import gzip
+import hashlib
+import json
+import os
+
+from modules import metrics
+from modules.storage import atomic_output
+
+# 📦 Yayımlanan JSON yükleri (grafik / karar destek) için hafif yardımcılar: numpy/pandas yüklemez,
+# böylece panel rotaları yalnızca hazır JSON'u sunarken ağır kütüphaneleri içe aktarmaz
+GZIP_LEVEL = 6
+
+
+def encode_json(data):
+    """Boşluksuz, UTF-8 JSON baytları."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_json_bytes(body, path):
+    """Baytları geçici dosyaya yazıp tek rename ile yayımlar (okuyucular yarım dosya görmez)."""
+    with atomic_output(path) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+    metrics.inc('bytes_written_total', len(body), format='json')
+    return path
+
+
+class Payload:
+    """Bellekte tutulan JSON yükü: ham ve önceden gzip'lenmiş gövde, ETag ve değişiklik zamanı."""
+
+    def __init__(self, body, mtime=None, compress=True):
+        self.body = body
+        self.gzip = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0) if compress else None
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.mtime = mtime
+        self._data = None
+
+    def data(self):
+        """Ayrıştırılmış JSON (ilk çağrıda bir kez ayrıştırılır; panel şablonları için)."""
+        if self._data is None:
+            self._data = json.loads(self.body)
+        return self._data
+
+    @classmethod
+    def from_file(cls, path, compress=True):
+        with open(path, 'rb') as f:
+            body = f.read()
+        metrics.inc('bytes_read_total', len(body), format='json')
+        return cls(body, mtime=os.path.getmtime(path), compress=compress)
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from modules import metrics
+from modules.storage import read_table, write_table
+from modules.manifest import Manifest
+from modules.aqi_calculator import compute_aqi_frame
+from modules.grid_tiles import generate_grid, GRID_INDEX_FILE
+from modules.timeseries import TimeSeriesStore, aggregate_scored
+from modules.chart_generator import generate_chart_json
+from modules.generate_action import generate_action_json
+from modules.derived_views import build_views
+from modules.zones import load_zones
+from modules.lazy import lazy_import
+
+# folium yalnızca tek parça harita (map_html) istendiğinde yüklenir
+map_generator = lazy_import('modules.map_generator')
+
+
+class TempoPipeline:
+    """
+    TEMPO NO2 → AQI → harita/grafik/karar destek akışını tek geçişte çalıştırır.
+    NO2 tablosu bir kez okunur, risk tablosu bellekte tüm üreticilere aktarılır;
+    risk tablosu yalnızca `risk_path` verilirse yazılır (format uzantıdan belirlenir, bkz. storage).
+    `on_stage(ad, sıra, toplam)` verilirse her aşamanın başında çağrılır (ilerleme bildirimi).
+    `grid_dir` verilirse harita için çok çözünürlüklü hücre piramidi üretilir (bkz. grid_tiles);
+    `map_html` tek parça folium haritasıdır ve büyük ızgaralarda önerilmez.
+    `timeseries_dir` ve `timestamp` verilirse zon/hücre toplamları zaman serisi deposuna eklenir.
+    `manifest_path` verilirse girdi hash'i değişmeyen ve çıktısı mevcut aşamalar atlanır (`force` ile devre dışı).
+    """
+
+    def __init__(self, csv_path, map_html=None, chart_json=None, action_json=None, risk_path=None,
+                 on_stage=None, manifest_path=None, force=False, grid_dir=None, timeseries_dir=None,
+                 timestamp=None):
+        self.csv_path = csv_path
+        self.map_html = map_html
+        self.grid_dir = grid_dir
+        self.timeseries = TimeSeriesStore(timeseries_dir) if timeseries_dir and timestamp else None
+        self.timestamp = timestamp
+        self.chart_json = chart_json
+        self.action_json = action_json
+        self.risk_path = risk_path
+        self.on_stage = on_stage
+        self.manifest_path = manifest_path
+        self.force = force
+        self.risk_df = None
+        self._views = None
+        self.timings = {}
+        self.skipped = []
+        self._pending = list(self.outputs)
+
+    @property
+    def outputs(self):
+        """Bu yapılandırmada üretilecek aşama → çıktı yolu eşlemesi (sıralı)."""
+        grid_index = os.path.join(self.grid_dir, GRID_INDEX_FILE) if self.grid_dir else None
+        series = self.timeseries.partition_path('zones', 'raw', self.timestamp) if self.timeseries else None
+        optional = [('write_risk', self.risk_path), ('grid', grid_index), ('timeseries', series),
+                    ('map', self.map_html), ('chart', self.chart_json), ('action', self.action_json)]
+        return {name: output for name, output in optional if output}
+
+    @property
+    def stages(self):
+        """Bu çalıştırmada yürütülecek aşamaların sırası."""
+        hashing = ['hash'] if self.manifest_path and not self.force else []
+        return hashing + ['load', 'aqi'] + self._pending
+
+    @contextmanager
+    def _stage(self, name):
+        if self.on_stage:
+            self.on_stage(name, len(self.timings), len(self.stages))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.timings[name] = round(seconds, 3)
+            metrics.observe('pipeline_stage_seconds', seconds, stage=name)
+
+    def load(self):
+        with self._stage('load'):
+            return read_table(self.csv_path)
+
+    def input_fingerprint(self, manifest):
+        """Aşama girdisi: NO2 tablosunun içerik hash'i + zon tanımlarının özeti (zonlar değişirse çıktılar eskir)."""
+        h = hashlib.sha256(manifest.fingerprint(self.csv_path).encode('utf-8'))
+        h.update(load_zones().fingerprint.encode('utf-8'))
+        return h.hexdigest()
+
+    def views(self):
+        """Grafik ve karar destek yükleri; risk tablosu üzerinden tek groupby ile bir kez hesaplanır."""
+        if self._views is None:
+            self._views = build_views(self.risk_df)
+        return self._views
+
+    def run(self):
+        """Güncel olmayan aşamaları çalıştırır; başarılıysa True, değilse False döndürür."""
+        self.timings = {}
+        self.skipped = []
+        self._pending = list(self.outputs)
+
+        if not os.path.exists(self.csv_path):
+            print(f"❌ CSV dosyası bulunamadı: {self.csv_path}")
+            return False
+
+        manifest = Manifest(self.manifest_path) if self.manifest_path else None
+        input_hash = None
+        if manifest and not self.force:
+            with self._stage('hash'):
+                input_hash = self.input_fingerprint(manifest)
+            self.skipped = [name for name, output in self.outputs.items()
+                            if manifest.is_fresh(name, input_hash, output)]
+            self._pending = [name for name in self.outputs if name not in self.skipped]
+            if not self._pending:
+                print("♻️ Girdi değişmedi, tüm çıktılar güncel; aşamalar atlandı.")
+                return True
+
+        df = self.load()
+        with self._stage('aqi'):
+            self.risk_df = compute_aqi_frame(df)
+            self._views = None
+        if self.risk_df is None:
+            return False
+
+        generators = {
+            'write_risk': lambda output: write_table(self.risk_df, output),
+            'grid': lambda output: generate_grid(csv_path=None, output_dir=os.path.dirname(output), df=self.risk_df),
+            'timeseries': lambda output: self.timeseries.append(self.timestamp, aggregate_scored(self.risk_df)),
+            'map': lambda output: map_generator.generate_map(csv_path=None, output_html=output, df=self.risk_df),
+            'chart': lambda output: generate_chart_json(csv_path=None, output_json=output, views=self.views()),
+            'action': lambda output: generate_action_json(csv_path=None, output_json=output, views=self.views()),
+        }
+        for name in self._pending:
+            output = self.outputs[name]
+            before = os.path.getmtime(output) if os.path.exists(output) else None
+            with self._stage(name):
+                generators[name](output)
+            # Üreticiler hataları yutup yalnızca yazdırdığı için, çıktı gerçekten yenilendiyse kaydet
+            if manifest and os.path.exists(output) and os.path.getmtime(output) != before:
+                manifest.record(name, input_hash or self.input_fingerprint(manifest), output)
+
+        if manifest:
+            manifest.save()
+        self.report()
+        return True
+
+    def report(self):
+        stages = " | ".join(f"{name}: {secs}s" for name, secs in self.timings.items())
+        skipped = f" | atlandı: {', '.join(self.skipped)}" if self.skipped else ""
+        print(f"⏱️ Aşama süreleri ({len(self.risk_df)} satır) → {stages}{skipped}")
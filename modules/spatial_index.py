@@ -0,0 +1,290 @@
+import math
+import os
+import threading
+
+import numpy as np
+
+from modules import metrics
+from modules.storage import read_table
+
+# 🧭 İndeks hücre boyutu (derece); TEMPO pikselinin (~0.02°) yaklaşık 10 katı
+INDEX_CELL_DEG = 0.25
+STAT_PERCENTILES = (50, 90, 99)
+# 📊 Hücre başına histogram: yarısı eşit doluluklu, yarısı istenen yüzdeliklerin (±%2) çevresinde sık kutular
+HIST_BINS = 64
+HIST_FOCUS_WIDTH = 0.02
+HIST_SAMPLE = 1 << 16
+# Değdiği hücrelerde bundan az piksel olan bbox'lar doğrudan (ham) taranır; özet yolu büyük kutular içindir
+RAW_SCAN_LIMIT = 50_000
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class CellAggregates:
+    """
+    Bir değer sütunu için hücre başına önceden hesaplanmış özetler: adet, toplam, en büyük ve histogram.
+    Hücre içindeki değerler sıralı tutulur; histogramın kümülatif sayıları bu sıralı dizide her kutunun
+    başlangıç ofsetidir. Böylece bir yüzdelik için yalnızca ilgili kutudaki ham değerler okunur (kesin sonuç).
+    """
+
+    def __init__(self, values, keys, offsets, nrows, ncols):
+        # Hücre içinde azalan komşu varsa hücre içi sıralı kopya tut (NO2 zaten sıralı, AQI ona göre monoton)
+        falls = np.diff(values) < 0
+        falls[offsets[1:-1][(offsets[1:-1] > 0) & (offsets[1:-1] < len(values))] - 1] = False
+        self.values = values[np.lexsort((values, keys))] if falls.any() else values
+        self.starts = offsets[:-1].reshape(nrows, ncols)
+
+        ncells = nrows * ncols
+        self.sums = np.bincount(keys, weights=self.values, minlength=ncells).reshape(nrows, ncols)
+        self.max = np.full(ncells, -np.inf)
+        filled = np.flatnonzero(np.diff(offsets))
+        if len(filled):
+            self.max[filled] = self.values[offsets[filled + 1] - 1]
+        self.max = self.max.reshape(nrows, ncols)
+
+        # Kutu sınırları seyrek örneklemin yüzdelikleri; uçlar gerçek en küçük/en büyük değer
+        sample = self.values[::max(len(values) // HIST_SAMPLE, 1)]
+        focus = HIST_BINS // (2 * len(STAT_PERCENTILES))
+        levels = [np.linspace(0, 1, HIST_BINS - focus * len(STAT_PERCENTILES) + 1)]
+        levels += [p / 100 + np.linspace(-HIST_FOCUS_WIDTH, HIST_FOCUS_WIDTH, focus) for p in STAT_PERCENTILES]
+        edges = np.unique(np.quantile(sample, np.clip(np.concatenate(levels), 0, 1)))
+        edges[0], edges[-1] = min(edges[0], values.min()), max(edges[-1], values.max())
+        self.edges = edges if len(edges) > 1 else np.repeat(edges, 2)
+        nbins = len(self.edges) - 1
+        hist = np.bincount(keys * nbins + self.bin_of(self.values), minlength=ncells * nbins)
+        # Kutu ekseni önde: bir kutunun tüm hücrelerdeki ofsetleri bitişik okunur
+        self.hist_cum = np.zeros((nbins + 1, nrows, ncols), dtype=np.uint32)
+        np.cumsum(hist.reshape(nrows, ncols, nbins).transpose(2, 0, 1), axis=0, out=self.hist_cum[1:])
+
+    def bin_of(self, values):
+        return np.searchsorted(self.edges[1:-1], values, side='right')
+
+    def percentiles(self, block, edge_values, percentiles):
+        """
+        `block` hücreleri ile kenar değerlerinin birleşiminde np.percentile (doğrusal) ile aynı yüzdelikler.
+        Sıra numarasının düştüğü kutu histogramdan bulunur, yalnızca o kutudaki değerler seçilir.
+        """
+        cum = self.hist_cum[(slice(None),) + block]
+        edge_bins = self.bin_of(edge_values)
+        hist = np.diff(cum.sum(axis=(1, 2), dtype=np.int64)) + np.bincount(edge_bins, minlength=len(cum) - 1)
+        hist_end = np.cumsum(hist)
+        n = int(hist_end[-1])
+        ranks = [p / 100 * (n - 1) for p in percentiles]
+        needed = sorted({j for rank in ranks for j in (int(math.floor(rank)), min(int(math.floor(rank)) + 1, n - 1))})
+
+        # Gereken her sıra için kutu bulunur; kutu başına değerler bir kez toplanıp tek partition ile seçilir
+        bins = np.searchsorted(hist_end, needed, side='right')
+        order = {}
+        for k in np.unique(bins):
+            lo, count = cum[k].ravel(), (cum[k + 1] - cum[k]).ravel().astype(np.int64)
+            first = (self.starts[block].ravel() + lo)[count > 0]
+            count = count[count > 0]
+            idx = np.repeat(first - (np.cumsum(count) - count), count) + np.arange(count.sum())
+            values = np.concatenate([self.values[idx], edge_values[edge_bins == k]])
+            within = {j: j - int(hist_end[k] - hist[k]) for j, b in zip(needed, bins) if b == k}
+            values = np.partition(values, sorted(set(within.values())))
+            order.update({j: values[t] for j, t in within.items()})
+
+        result = []
+        for rank in ranks:
+            below = int(math.floor(rank))
+            low, high = order[below], order[min(below + 1, n - 1)]
+            result.append(low + (high - low) * (rank - below))
+        return result
+
+
+class PixelIndex:
+    """
+    Skorlanmış TEMPO pikselleri için düzenli ızgara indeksi.
+    Pikseller hücre anahtarına (satır * sütun_sayısı + sütun) göre sıralanır ve her hücrenin başlangıç
+    ofseti tutulur; böylece bir enlem satırındaki ardışık hücreler tek bir dilimle okunur. bbox istatistikleri
+    için tamamen kapsanan hücrelerde CellAggregates kullanılır, ham pikseller yalnızca kenar hücrelerde taranır.
+    """
+
+    def __init__(self, df, cell_deg=INDEX_CELL_DEG):
+        lat = df['latitude'].to_numpy(dtype=float)
+        lon = df['longitude'].to_numpy(dtype=float)
+        self.cell_deg = cell_deg
+        self.lat_min, self.lon_min = float(lat.min()), float(lon.min())
+        self.lat_max, self.lon_max = float(lat.max()), float(lon.max())
+        rows = ((lat - self.lat_min) / cell_deg).astype(np.int64)
+        cols = ((lon - self.lon_min) / cell_deg).astype(np.int64)
+        self.nrows, self.ncols = int(rows.max()) + 1, int(cols.max()) + 1
+
+        keys = rows * self.ncols + cols
+        # Hücre anahtarına, hücre içinde NO2 değerine göre sırala (CellAggregates hücre içi sıralı değer bekler)
+        no2 = df['NO2_column'].to_numpy(dtype=float)
+        order = np.lexsort((no2, keys))
+        self.offsets = np.searchsorted(keys[order], np.arange(self.nrows * self.ncols + 1))
+        self.lat, self.lon = lat[order], lon[order]
+        self.aqi = df['aqi'].to_numpy()[order]
+        self.no2 = no2[order]
+        self.zone = df['zone'].to_numpy()[order] if 'zone' in df.columns else None
+        keys = keys[order]
+        self.cell_counts = np.diff(self.offsets).reshape(self.nrows, self.ncols)
+        self.aggregates = {
+            'aqi': CellAggregates(self.aqi.astype(float), keys, self.offsets, self.nrows, self.ncols),
+            'NO2_column': CellAggregates(self.no2, keys, self.offsets, self.nrows, self.ncols),
+        }
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _cell_range(self, value, origin, count):
+        # Sınırlama int()'ten önce float uzayında: aşırı büyük değerlerde inf → OverflowError olmasın
+        return int(math.floor(min(max((value - origin) / self.cell_deg, 0.0), count - 1)))
+
+    def _candidates(self, r0, r1, c0, c1):
+        """Satır [r0, r1] × sütun [c0, c1] hücrelerindeki piksel indeksleri."""
+        slices = [np.arange(self.offsets[r * self.ncols + c0], self.offsets[r * self.ncols + c1 + 1])
+                  for r in range(r0, r1 + 1)]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _filter(self, idx, west, south, east, north):
+        lat, lon = self.lat[idx], self.lon[idx]
+        return idx[(lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)]
+
+    def _bbox_cells(self, west, south, east, north):
+        """bbox'ın değdiği hücre aralığı (r0, r1, c0, c1); kesişim yoksa None."""
+        if north < self.lat_min or east < self.lon_min or south > north or west > east:
+            return None
+        r0, r1 = self._cell_range(south, self.lat_min, self.nrows), self._cell_range(north, self.lat_min, self.nrows)
+        c0, c1 = self._cell_range(west, self.lon_min, self.ncols), self._cell_range(east, self.lon_min, self.ncols)
+        return r0, r1, c0, c1
+
+    def bbox(self, west, south, east, north):
+        """bbox içindeki piksellerin (sıralı dizilerdeki) indeksleri."""
+        cells = self._bbox_cells(west, south, east, north)
+        if cells is None:
+            return np.empty(0, dtype=np.int64)
+        return self._filter(self._candidates(*cells), west, south, east, north)
+
+    def _inner_cells(self, west, south, east, north, r0, r1, c0, c1):
+        """
+        bbox'ın tamamen kapsadığı hücre bloğu (ir0, ir1, ic0, ic1); yoksa None.
+        Sınırı içeren hücreler kenar sayılır; bbox verinin dışına taşıyorsa uçtaki hücreler de tam kapsanır.
+        """
+        ir0 = r0 if south <= self.lat_min else r0 + 1
+        ir1 = r1 if north >= self.lat_max else r1 - 1
+        ic0 = c0 if west <= self.lon_min else c0 + 1
+        ic1 = c1 if east >= self.lon_max else c1 - 1
+        if ir0 > ir1 or ic0 > ic1:
+            return None
+        return ir0, ir1, ic0, ic1
+
+    def bbox_stats(self, west, south, east, north):
+        cells = self._bbox_cells(west, south, east, north)
+        inner = None
+        if cells is not None:
+            r0, r1, c0, c1 = cells
+            if self.cell_counts[r0:r1 + 1, c0:c1 + 1].sum() > RAW_SCAN_LIMIT:
+                inner = self._inner_cells(west, south, east, north, *cells)
+        if inner is None:
+            # Küçük sorgu ya da tam kapsanan hücre yok: ham pikseller üzerinden istatistik
+            idx = self.bbox(west, south, east, north)
+            stats = {'count': int(len(idx))}
+            if len(idx) == 0:
+                return stats
+            for name, values in (('aqi', self.aqi[idx]), ('NO2_column', self.no2[idx])):
+                stats[name] = {
+                    'mean': float(values.mean()),
+                    'max': float(values.max()),
+                    **{f'p{p}': float(v) for p, v in zip(STAT_PERCENTILES, np.percentile(values, STAT_PERCENTILES))},
+                }
+            return stats
+
+        # Kenar hücreler: iç bloğun üstü/altı tam satır, iç satırlarda sol/sağ şeritler
+        ir0, ir1, ic0, ic1 = inner
+        parts = [self._candidates(r, r, c0, c1) for r in range(r0, r1 + 1) if not ir0 <= r <= ir1]
+        for r in range(ir0, ir1 + 1):
+            if c0 < ic0:
+                parts.append(self._candidates(r, r, c0, ic0 - 1))
+            if ic1 < c1:
+                parts.append(self._candidates(r, r, ic1 + 1, c1))
+        edge = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        edge = self._filter(edge, west, south, east, north)
+
+        block = (slice(ir0, ir1 + 1), slice(ic0, ic1 + 1))
+        stats = {'count': int(self.cell_counts[block].sum()) + int(len(edge))}
+        if stats['count'] == 0:
+            return stats
+        for name, values in (('aqi', self.aqi[edge]), ('NO2_column', self.no2[edge])):
+            agg = self.aggregates[name]
+            values = values.astype(float)
+            stats[name] = {
+                'mean': (float(agg.sums[block].sum()) + float(values.sum())) / stats['count'],
+                'max': max(float(agg.max[block].max()), float(values.max()) if len(values) else -np.inf),
+                **{f'p{p}': float(v) for p, v in zip(STAT_PERCENTILES, agg.percentiles(block, values, STAT_PERCENTILES))},
+            }
+        return stats
+
+    def nearest(self, lat, lon, max_distance_deg=2.0):
+        """En yakın piksel; hücre halkaları dışa doğru taranır, `max_distance_deg` içinde yoksa None."""
+        row = self._cell_range(lat, self.lat_min, self.nrows)
+        col = self._cell_range(lon, self.lon_min, self.ncols)
+        lon_scale = max(math.cos(math.radians(lat)), 1e-6)
+        best, best_d = None, math.inf
+        max_ring = int(math.ceil(max_distance_deg / self.cell_deg)) + 1
+
+        for k in range(max_ring + 1):
+            # k. halkadaki pikseller en az (k - 1) hücre uzaktadır; daha yakın aday kalmadıysa dur
+            if best is not None and best_d <= (k - 1) * self.cell_deg * lon_scale:
+                break
+            r0, r1 = max(row - k, 0), min(row + k, self.nrows - 1)
+            c0, c1 = max(col - k, 0), min(col + k, self.ncols - 1)
+            if k == 0:
+                idx = self._candidates(r0, r1, c0, c1)
+            else:
+                # Yalnızca halkanın kenarları: üst/alt satırlar tam, aradaki satırlarda sol/sağ hücreler
+                parts = [self._candidates(r, r, c0, c1) for r in {r0, r1} if abs(r - row) == k]
+                for r in range(max(row - k + 1, 0), min(row + k - 1, self.nrows - 1) + 1):
+                    for c in {c0, c1}:
+                        if abs(c - col) == k:
+                            parts.append(self._candidates(r, r, c, c))
+                idx = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+            if len(idx) == 0:
+                continue
+            d = np.hypot(self.lat[idx] - lat, (self.lon[idx] - lon) * lon_scale)
+            i = int(np.argmin(d))
+            if d[i] < best_d:
+                best, best_d = int(idx[i]), float(d[i])
+
+        if best is None or best_d > max_distance_deg:
+            return None
+        return {
+            'latitude': float(self.lat[best]),
+            'longitude': float(self.lon[best]),
+            'aqi': int(self.aqi[best]),
+            'NO2_column': float(self.no2[best]),
+            'zone': None if self.zone is None else str(self.zone[best]),
+            'distance_km': round(float(haversine_km(lat, lon, self.lat[best], self.lon[best])), 3),
+        }
+
+
+class PixelIndexStore:
+    """Risk tablosundan PixelIndex'i bir kez kurar; tablo değiştiğinde (yeni veri akışı) yeniden kurar."""
+
+    COLUMNS = ['latitude', 'longitude', 'NO2_column', 'zone', 'aqi']
+
+    def __init__(self, risk_path):
+        self.risk_path = risk_path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._index = None
+
+    def get(self):
+        if not os.path.exists(self.risk_path):
+            return None
+        stamp = os.path.getmtime(self.risk_path)
+        with self._lock:
+            metrics.inc('cache_hits_total' if stamp == self._stamp else 'cache_misses_total', cache='pixel_index')
+            if stamp != self._stamp:
+                df = read_table(self.risk_path, columns=self.COLUMNS)
+                self._index = PixelIndex(df) if len(df) else None
+                self._stamp = stamp
+            return self._index
@@ -0,0 +1,190 @@
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from modules import metrics
+from modules.lazy import lazy_import
+
+# numpy/pandas ilk tablo okuma/yazmada yüklenir: yol yardımcıları (table_path, atomic_output) hafif kalır
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# 🗄️ Ara tablo formatı (tempo_no2 / tempo_aqi_risk): csv | parquet | feather | npy
+# parquet/feather için pyarrow gerekir; npy formatı her sütunu ayrı, bellek eşlemeli (mmap) .npy dosyası olarak saklar.
+TABLE_FORMAT = os.environ.get('STORMSENTINEL_TABLE_FORMAT', 'csv').lower()
+
+FORMAT_EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'npy': '.npyd',  # sütun başına .npy dosyası içeren klasör
+}
+NPY_COLUMNS_FILE = 'columns.json'
+# Yayımlanan .npyd sürümleri en az bu kadar saklanır (o sürümü okumakta olanlar için)
+NPY_VERSION_GRACE_SECONDS = 60
+
+
+def table_format(path):
+    """Dosya uzantısından tablo formatını belirler (bilinmiyorsa csv)."""
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in FORMAT_EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    return 'csv'
+
+
+def table_path(path, fmt=None):
+    """Yolun uzantısını yapılandırılan (veya verilen) formata göre değiştirir."""
+    fmt = (fmt or TABLE_FORMAT).lower()
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Bilinmeyen tablo formatı: {fmt} (desteklenen: {', '.join(FORMAT_EXTENSIONS)})")
+    return os.path.splitext(path)[0] + FORMAT_EXTENSIONS[fmt]
+
+
+def read_table(path, columns=None):
+    """Tabloyu uzantısına göre okur; `columns` verilirse yalnızca bu sütunlar yüklenir."""
+    fmt = table_format(path)
+    metrics.inc('bytes_read_total', metrics.path_size(path), format=fmt)
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    if fmt == 'feather':
+        return pd.read_feather(path, columns=columns)
+    if fmt == 'npy':
+        try:
+            return _read_npy(path, columns)
+        except FileNotFoundError:
+            # Okunan sürüm bu arada budandı: bağlantıyı yeniden çözüp bir kez daha dene
+            return _read_npy(path, columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def _read_npy(path, columns):
+    # Bağlantı bir kez çözülür: okuma sırasında yeni sürüm yayımlansa da tüm sütunlar aynı sürümden gelir
+    path = os.path.realpath(path)
+    with open(os.path.join(path, NPY_COLUMNS_FILE), 'r', encoding='utf-8') as f:
+        names = json.load(f)
+    names = [c for c in names if columns is None or c in columns]
+    return pd.DataFrame({c: np.load(os.path.join(path, f'{c}.npy'), mmap_mode='r') for c in names})
+
+
+def require_csv(path):
+    """Blok blok (akış modunda) yazan üreticiler yalnızca CSV üretir; başka formatta ValueError fırlatır."""
+    fmt = table_format(path)
+    if fmt != 'csv':
+        raise ValueError(f"Akış modu yalnızca CSV yazabilir: {path} ({fmt}). write_table ile tam tablo yazın.")
+    return path
+
+
+def _remove(path):
+    if os.path.islink(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _version_prefix(name):
+    return f'.{name}.v'
+
+
+def _version_time(name, entry):
+    return int(entry[len(_version_prefix(name)):].split('.')[0])
+
+
+def _publish_dir(tmp_path, path):
+    """
+    Klasör çıktısını (.npyd) sürümlü klasör + sembolik bağlantı ile yayımlar: `path` yeni sürüme işaret eden
+    bağlantıdır ve tek os.replace ile değiştirilir, yani `path` hiçbir an yok olmaz. Okumakta olanlar için
+    önceki sürüm ve NPY_VERSION_GRACE_SECONDS'tan genç sürümler saklanır, daha eskileri silinir. Sembolik bağlantı oluşturulamazsa (ör. yetkisiz Windows)
+    eski klasörü kenara alıp yeniden adlandırmaya geri düşülür (kısa bir an `path` bulunmaz).
+    """
+    folder, name = os.path.split(path)
+    version = f'{_version_prefix(name)}{time.time_ns()}.{os.getpid()}'
+    os.replace(tmp_path, os.path.join(folder, version))
+    link_tmp = tmp_path + '.link'
+    try:
+        os.symlink(version, link_tmp, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        if os.path.isdir(path):
+            os.replace(path, tmp_path + '.old')
+        os.replace(os.path.join(folder, version), path)
+        _remove(tmp_path + '.old')
+        return
+
+    previous = os.readlink(path) if os.path.islink(path) else None
+    if previous and not previous.startswith(_version_prefix(name)):
+        previous = None
+    if os.path.isdir(path) and not os.path.islink(path):
+        # Eski düzen (gerçek klasör): bağlantıya geçişte bir kez kenara alınır
+        os.replace(path, tmp_path + '.old')
+    os.replace(link_tmp, path)
+    _remove(tmp_path + '.old')
+    # Geçerli ve önceki sürüm ile bekleme süresinden genç sürümler (okuyucular, eşzamanlı yazarlar) korunur
+    expired = time.time_ns() - NPY_VERSION_GRACE_SECONDS * 10**9
+    for entry in os.listdir(folder):
+        if entry.startswith(_version_prefix(name)) and entry not in (version, previous) \
+                and _version_time(name, entry) < expired:
+            _remove(os.path.join(folder, entry))
+
+
+@contextmanager
+def atomic_output(path):
+    """
+    Yazımı aynı klasördeki geçici yola yönlendirir; blok hatasız biterse tek rename ile `path`'e yayımlar.
+    Eşzamanlı okuyucular (diğer işçiler) yarım yazılmış dosya görmez; hata olursa eski çıktı korunur.
+    Klasör çıktıları (.npyd) sürümlü klasör + sembolik bağlantı ile yayımlanır (bkz. _publish_dir).
+    """
+    folder, name = os.path.split(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f'.{name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        yield tmp_path
+        if os.path.isdir(tmp_path):
+            _publish_dir(tmp_path, os.path.join(folder, name))
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        _remove(tmp_path)
+        _remove(tmp_path + '.link')
+
+
+def write_table(df, path):
+    """Tabloyu uzantısına göre (geçici yola yazıp rename ile) yazar ve yazılan yolu döndürür."""
+    fmt = table_format(path)
+    with atomic_output(path) as tmp_path:
+        if fmt == 'parquet':
+            df.to_parquet(tmp_path, index=False)
+        elif fmt == 'feather':
+            df.reset_index(drop=True).to_feather(tmp_path)
+        elif fmt == 'npy':
+            os.makedirs(tmp_path)
+            for c in df.columns:
+                values = df[c].to_numpy()
+                if values.dtype == object:
+                    values = values.astype(str)  # mmap için sabit genişlikli unicode
+                np.save(os.path.join(tmp_path, f'{c}.npy'), values)
+            with open(os.path.join(tmp_path, NPY_COLUMNS_FILE), 'w', encoding='utf-8') as f:
+                json.dump(list(df.columns), f)
+        else:
+            df.to_csv(tmp_path, index=False)
+    metrics.inc('bytes_written_total', metrics.path_size(path), format=fmt)
+    return path
+
+
+def remove_table(path):
+    """Tabloyu siler; .npyd ise bağlantıyla birlikte tüm sürüm klasörlerini de."""
+    _remove(path)
+    if table_format(path) == 'npy':
+        folder, name = os.path.split(os.path.abspath(path))
+        for entry in os.listdir(folder):
+            if entry.startswith(_version_prefix(name)):
+                _remove(os.path.join(folder, entry))
+
+
+def export_csv(path, output_csv):
+    """Herhangi bir formattaki tabloyu CSV olarak dışa aktarır."""
+    return write_table(read_table(path), output_csv)
@@ -2,6 +2,12 @@ import h5py
 import pandas as pd
 import numpy as np
 import os
+import re
+
+from modules import metrics
+from modules.grid_cache import load_region_geometry
+from modules.storage import write_table, atomic_output, require_csv
+from modules.zones import load_zones
 """
 def extract_tempo_data(hdf_path='data/temp.nc', output_csv='data/tempo_no2.csv'):
     try:
@@ -51,19 +57,69 @@ def extract_tempo_data(hdf_path='data/temp.nc', output_csv='data/tempo_no2.csv')
         return None
         
         """
-def extract_tempo_data(hdf_path='data/temp.nc', output_csv='data/tempo_no2.csv'):
+# 🎯 İlgi alanı (ROI): bbox (west, south, east, north) veya zon adı → enlem/boylam indeks dilimleri
+def resolve_region(region):
+    """(bbox, zon adı veya None) döndürür; zon için bbox, zonun sınır kutusudur."""
+    if region is None:
+        return None, None
+    if isinstance(region, str):
+        zones = load_zones()
+        for zone in zones.zones:
+            if zone.name == region:
+                return (zone.west, zone.south, zone.east, zone.north), zone.name
+        raise ValueError(f"Bilinmeyen zon: {region} (tanımlı zonlar: {', '.join(zones.names[:-1])})")
+    west, south, east, north = map(float, region)
+    if west > east or south > north:
+        raise ValueError(f"Geçersiz bbox: {region} (west, south, east, north bekleniyor)")
+    return (west, south, east, north), None
+
+def _axis_slice(axis, low, high):
+    # Sınırlar, zonlamayla tutarlı olması için yuvarlanmış koordinatlarla karşılaştırılır
+    idx = np.flatnonzero((np.round(axis, 4) >= low) & (np.round(axis, 4) <= high))
+    return slice(int(idx[0]), int(idx[-1]) + 1) if len(idx) else None
+
+def region_slices(lat, lon, bbox):
+    """bbox'ı kapsayan (enlem, boylam) dilimleri; bbox ızgarayla kesişmiyorsa (None, None)."""
+    if bbox is None:
+        return slice(None), slice(None)
+    west, south, east, north = bbox
+    lat_sl, lon_sl = _axis_slice(lat, south, north), _axis_slice(lon, west, east)
+    if lat_sl is None or lon_sl is None:
+        return None, None
+    return lat_sl, lon_sl
+
+def _zone_mask(zone_name, lat, lon):
+    # Zon çakışmalarında ilk eşleşen kazanır: yalnızca gerçekten bu zona atanan pikseller
+    zones = load_zones()
+    return zones.names[zones.codes(lat, lon)] == zone_name
+
+@metrics.instrumented
+def extract_tempo_data(hdf_path='data/temp.nc', output_csv='data/tempo_no2.csv', region=None):
+    """
+    Granüldeki sonlu NO2 piksellerini tabloya yazar. `region` (bbox veya zon adı) verilirse
+    yalnızca o bölgeyi kapsayan hiperdilim (hyperslab) diskten okunur.
+    """
     try:
+        bbox, zone_name = resolve_region(region)
         with h5py.File(hdf_path, 'r') as f:
             print("📦 Dosya açıldı:", list(f.keys()))
 
             if 'product' in f and 'vertical_column_troposphere' in f['product'] and \
                'latitude' in f and 'longitude' in f:
                 
-                raw = f['product']['vertical_column_troposphere'][...]  # (1, lat, lon)
+                ds = f['product']['vertical_column_troposphere']  # (1, lat, lon)
                 lat = f['latitude'][...]  # (lat,)
                 lon = f['longitude'][...]  # (lon,)
+                lat_sl, lon_sl = region_slices(lat, lon, bbox)
+                if lat_sl is None:
+                    print(f"⚠️ Bölge TEMPO ızgarasıyla kesişmiyor: {region}")
+                    return None
+                raw = ds[0, lat_sl, lon_sl] if ds.ndim == 3 else ds[lat_sl, lon_sl]
+                # ROI geometrisi tam ızgaranın önbellekteki geometrisinden kesilir (ROI başına disk kaydı yok)
+                geometry = load_region_geometry(lat, lon, lat_sl, lon_sl)
+                lat, lon = lat[lat_sl], lon[lon_sl]
 
-                no2 = np.squeeze(raw).T  # (lon, lat)
+                no2 = raw.T  # (lon, lat)
                 print("📐 no2 shape:", no2.shape)
 
             else:
@@ -74,21 +130,137 @@ def extract_tempo_data(hdf_path='data/temp.nc', output_csv='data/tempo_no2.csv')
             mask = np.isfinite(no2)
             jj, ii = np.where(mask)  # j: lon index, i: lat index
 
-            # NumPy ile kayıt üretimi
-            lat_vals = lat[ii]
-            lon_vals = lon[jj]
+            # NumPy ile kayıt üretimi (yuvarlanmış eksenler ızgara önbelleğinden; piksel başına yuvarlama yok)
             no2_vals = no2[jj, ii]
 
             df = pd.DataFrame({
-                'latitude': np.round(lat_vals, 4),
-                'longitude': np.round(lon_vals, 4),
+                'latitude': geometry.lat[ii],
+                'longitude': geometry.lon[jj],
                 'no2': np.round(no2_vals.astype(float), 4)
             })
+            if zone_name:
+                df = df[_zone_mask(zone_name, df['latitude'].to_numpy(), df['longitude'].to_numpy())].reset_index(drop=True)
 
-            df.to_csv(output_csv, index=False)
+            metrics.inc('bytes_read_total', raw.nbytes, format='hdf5')
+            metrics.inc('rows_processed_total', len(df), stage='extract')
+            write_table(df, output_csv)
             print(f"✅ {len(df)} kayıt yazıldı → {output_csv}")
             return output_csv
 
     except Exception as e:
         print(f"❌ TEMPO veri okuma hatası: {e}")
-        return None        
\ No newline at end of file
+        return None
+
+# 📦 Blok okuma için varsayılan satır sayısı (veri seti chunk'sız ise)
+DEFAULT_BLOCK_ROWS = 256
+
+def _aligned_block_rows(ds, block_rows=None):
+    """Blok boyunu veri setinin enlem chunk boyutunun katına yuvarlar."""
+    chunk_rows = ds.chunks[-2] if ds.chunks else DEFAULT_BLOCK_ROWS
+    if not block_rows:
+        return chunk_rows
+    return max(1, -(-block_rows // chunk_rows)) * chunk_rows
+
+def _block_ranges(start, stop, step):
+    """
+    [start, stop) satırlarını mutlak `step` katlarında bölünen bloklara ayırır: ROI bir chunk ortasında
+    başlasa da ilk blok bir sonraki chunk sınırında biter, her chunk yalnızca bir kez açılır.
+    """
+    while start < stop:
+        end = min((start // step + 1) * step, stop)
+        yield start, end
+        start = end
+
+def iter_tempo_blocks(hdf_path='data/temp.nc', block_rows=None, zoned=False, region=None):
+    """
+    vertical_column_troposphere veri setini enlem satırı blokları halinde okur ve her blok için
+    sonlu (finite) pikselleri latitude/longitude/no2 DataFrame'i olarak üretir.
+    Bellek kullanımı granül boyutuna değil blok boyutuna bağlıdır. Satır sırası enlem önceliklidir.
+    `zoned=True` ise önbellekteki ızgara geometrisiyle yalnızca zon içi pikseller, `zone` sütunuyla üretilir
+    (zonlama koordinatlardan yeniden yapılmaz).
+    `region` (bbox veya zon adı) verilirse yalnızca bölgeyi kapsayan enlem/boylam dilimi okunur.
+    """
+    bbox, zone_name = resolve_region(region)
+    with h5py.File(hdf_path, 'r') as f:
+        if not ('product' in f and 'vertical_column_troposphere' in f['product'] and
+                'latitude' in f and 'longitude' in f):
+            raise KeyError("Beklenen veri alanları bulunamadı.")
+
+        ds = f['product']['vertical_column_troposphere']  # (1, lat, lon) veya (lat, lon)
+        lat = f['latitude'][...]
+        lon = f['longitude'][...]
+        lat_sl, lon_sl = region_slices(lat, lon, bbox)
+        if lat_sl is None:
+            return
+        geometry = load_region_geometry(lat, lon, lat_sl, lon_sl) if zoned else None
+        lat, lon = lat[lat_sl], lon[lon_sl]
+        row0 = lat_sl.start or 0
+        lon = np.round(lon, 4)
+        step = _aligned_block_rows(ds, block_rows)
+
+        for start, stop in _block_ranges(row0, row0 + len(lat), step):
+            r0, r1 = start - row0, stop - row0  # ROI içi satırlar
+            rows = slice(start, stop)
+            block = ds[0, rows, lon_sl] if ds.ndim == 3 else ds[rows, lon_sl]
+
+            metrics.inc('bytes_read_total', block.nbytes, format='hdf5')
+            if geometry is not None:
+                df = geometry.gather(block, r0)
+            else:
+                mask = np.isfinite(block)
+                ii, jj = np.nonzero(mask)  # i: blok içi lat index, j: lon index
+                df = pd.DataFrame({
+                    'latitude': np.round(lat[r0:r1][ii], 4),
+                    'longitude': lon[jj],
+                    'no2': np.round(block[ii, jj].astype(float), 4)
+                })
+
+            if zone_name and len(df):
+                keep = (df['zone'].to_numpy() == zone_name) if geometry is not None else \
+                    _zone_mask(zone_name, df['latitude'].to_numpy(), df['longitude'].to_numpy())
+                df = df[keep].reset_index(drop=True)
+            if len(df):
+                yield df
+
+@metrics.instrumented
+def extract_tempo_data_stream(hdf_path='data/temp.nc', output_csv='data/tempo_no2.csv', block_rows=None, region=None):
+    """extract_tempo_data'nın akış modu: CSV blok blok yazılır, tüm ızgara belleğe alınmaz (yalnızca .csv)."""
+    require_csv(output_csv)
+    try:
+        total = 0
+        with atomic_output(output_csv) as tmp_path, open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+            for df in iter_tempo_blocks(hdf_path, block_rows=block_rows, region=region):
+                df.to_csv(out, index=False, header=(total == 0))
+                total += len(df)
+
+        if total == 0:
+            print("⚠️ Veri boş, kayıt oluşturulamadı.")
+            return None
+        print(f"✅ {total} kayıt blok blok yazıldı → {output_csv}")
+        return output_csv
+
+    except Exception as e:
+        print(f"❌ TEMPO veri okuma hatası: {e}")
+        return None
+
+
+# 🕒 Granül zaman damgası: dosya adındaki YYYYMMDDTHHMMSSZ (TEMPO adlandırması), yoksa time_coverage_start, yoksa mtime
+GRANULE_TIME_PATTERN = re.compile(r'(\d{8}T\d{6})Z?')
+
+def granule_timestamp(hdf_path):
+    """Granülün UTC zaman damgasını 'YYYYMMDDTHHMMSSZ' biçiminde döndürür."""
+    match = GRANULE_TIME_PATTERN.search(os.path.basename(hdf_path))
+    if match:
+        return match.group(1) + 'Z'
+    try:
+        with h5py.File(hdf_path, 'r') as f:
+            start = f.attrs.get('time_coverage_start')
+        if start is not None:
+            start = start.decode() if isinstance(start, bytes) else str(start)
+            ts = pd.Timestamp(start)
+            if ts.tzinfo is not None:
+                ts = ts.tz_convert('UTC').tz_localize(None)
+            return ts.strftime('%Y%m%dT%H%M%SZ')
+    except (OSError, ValueError, TypeError):
+        pass
+    return pd.Timestamp(os.path.getmtime(hdf_path), unit='s').strftime('%Y%m%dT%H%M%SZ')
@@ -0,0 +1,140 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from modules.storage import read_table, remove_table, write_table, table_path, FORMAT_EXTENSIONS
+
+# 📈 Hücre serileri için sabit ızgara (derece); granüller arasında karşılaştırılabilir olması için sabittir
+TREND_CELL_DEG = 0.5
+KINDS = {'zones': ['zone'], 'cells': ['row', 'col']}
+# Çözünürlük → bölüm adındaki zaman anahtarının uzunluğu (YYYYMMDDTHHMMSSZ / YYYYMMDDTHH / YYYYMMDD)
+RESOLUTIONS = {'raw': 16, 'hourly': 11, 'daily': 8}
+TIME_FORMATS = {'raw': '%Y%m%dT%H%M%SZ', 'hourly': '%Y%m%dT%H', 'daily': '%Y%m%d'}
+
+
+def aggregate_scored(df):
+    """
+    Skorlanmış piksel tablosunu (latitude, longitude, NO2_column/no2, zone, aqi) zon ve hücre toplamlarına indirger.
+    Toplamlar (aqi_sum, no2_sum, pixels, aqi_max) birleştirilebilir; ortalamalar sorgu anında hesaplanır.
+    """
+    no2_col = 'NO2_column' if 'NO2_column' in df.columns else 'no2'
+    frame = pd.DataFrame({
+        'zone': df['zone'].to_numpy(),
+        'row': np.floor(df['latitude'].to_numpy() / TREND_CELL_DEG).astype(np.int64),
+        'col': np.floor(df['longitude'].to_numpy() / TREND_CELL_DEG).astype(np.int64),
+        'aqi': df['aqi'].to_numpy(),
+        'no2': df[no2_col].to_numpy(dtype=float),
+    })
+    return {kind: _sum_frame(frame, keys) for kind, keys in KINDS.items()}
+
+
+def _sum_frame(frame, keys):
+    return frame.groupby(keys, sort=True).agg(
+        aqi_sum=('aqi', 'sum'), no2_sum=('no2', 'sum'), pixels=('aqi', 'size'), aqi_max=('aqi', 'max')
+    ).reset_index()
+
+
+def merge_aggregates(parts):
+    """Birden çok aggregate_scored sonucunu (ör. bloklar, granüller) tek sonuçta birleştirir."""
+    merged = {}
+    for kind, keys in KINDS.items():
+        frames = [p[kind] for p in parts if p is not None and len(p[kind])]
+        if not frames:
+            merged[kind] = pd.DataFrame(columns=keys + ['aqi_sum', 'no2_sum', 'pixels', 'aqi_max'])
+            continue
+        merged[kind] = pd.concat(frames).groupby(keys, sort=True).agg(
+            aqi_sum=('aqi_sum', 'sum'), no2_sum=('no2_sum', 'sum'), pixels=('pixels', 'sum'), aqi_max=('aqi_max', 'max')
+        ).reset_index()
+    return merged
+
+
+class TimeSeriesStore:
+    """
+    Granül zaman damgasına göre bölümlenmiş, yalnızca eklemeli zon/hücre toplamları deposu.
+
+        <root>/<kind>/raw/<YYYYMMDDTHHMMSSZ>.<ext>   her granül için bir bölüm (hiç yeniden yazılmaz)
+        <root>/<kind>/hourly/<YYYYMMDDTHH>.<ext>     yalnızca yeni granülün saati yeniden toplanır
+        <root>/<kind>/daily/<YYYYMMDD>.<ext>         yalnızca yeni granülün günü yeniden toplanır
+
+    Aralık sorguları dosya adlarındaki zaman anahtarıyla budanır; yalnızca aralıktaki bölümler okunur.
+    Bir dönemin tek bölümü vardır: TABLE_FORMAT değişse de yeni yazım aynı anahtarlı eski biçimdeki bölümü
+    siler, okumalar da anahtar başına yalnızca en son yazılan bölümü alır (dönem iki kez sayılmaz).
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _dir(self, kind, resolution):
+        return os.path.join(self.root, kind, resolution)
+
+    def partition_path(self, kind, resolution, key):
+        return table_path(os.path.join(self._dir(kind, resolution), f'{key}.csv'))
+
+    def _partitions(self, kind, resolution, prefix=''):
+        """Anahtar sırasıyla bölüm yolları; aynı anahtarın birden çok biçimde bölümü varsa en son yazılanı."""
+        pattern = os.path.join(self._dir(kind, resolution), f'{prefix}*')
+        exts = tuple(FORMAT_EXTENSIONS.values())
+        latest = {}
+        for path in glob.glob(pattern):
+            if not path.endswith(exts):
+                continue
+            key = self._key(path)
+            if key not in latest or os.path.getmtime(path) > os.path.getmtime(latest[key]):
+                latest[key] = path
+        return [latest[key] for key in sorted(latest)]
+
+    @staticmethod
+    def _key(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    def _write_partition(self, df, kind, resolution, key):
+        """Bölümü geçerli biçimde yazar ve aynı döneme ait başka biçimdeki bölümleri siler."""
+        os.makedirs(self._dir(kind, resolution), exist_ok=True)
+        path = write_table(df, self.partition_path(kind, resolution, key))
+        for ext in FORMAT_EXTENSIONS.values():
+            stale = os.path.join(self._dir(kind, resolution), f'{key}{ext}')
+            if stale != path and os.path.lexists(stale):
+                remove_table(stale)
+        return path
+
+    def append(self, timestamp, aggregates):
+        """Granül toplamlarını ekler ve etkilenen saatlik/günlük toplamları yeniler. Ham bölüm yolunu döndürür."""
+        raw_path = None
+        for kind, keys in KINDS.items():
+            path = self._write_partition(aggregates[kind].assign(granules=1), kind, 'raw', timestamp)
+            raw_path = raw_path or path
+            self._rollup(kind, keys, 'raw', 'hourly', timestamp[:RESOLUTIONS['hourly']])
+            self._rollup(kind, keys, 'hourly', 'daily', timestamp[:RESOLUTIONS['daily']])
+        return raw_path
+
+    def _rollup(self, kind, keys, source, target, bucket):
+        frames = [read_table(p) for p in self._partitions(kind, source, prefix=bucket)]
+        rolled = pd.concat(frames).groupby(keys, sort=True).agg(
+            aqi_sum=('aqi_sum', 'sum'), no2_sum=('no2_sum', 'sum'), pixels=('pixels', 'sum'),
+            aqi_max=('aqi_max', 'max'), granules=('granules', 'sum')
+        ).reset_index()
+        self._write_partition(rolled, kind, target, bucket)
+
+    def query(self, kind='zones', start=None, end=None, resolution='hourly'):
+        """[start, end] aralığındaki bölümleri 'time' sütunu ve aqi_mean/no2_mean ile döndürür."""
+        if kind not in KINDS or resolution not in RESOLUTIONS:
+            raise ValueError(f"Geçersiz sorgu: kind={kind}, resolution={resolution}")
+        fmt = TIME_FORMATS[resolution]
+        lo = pd.Timestamp(start).strftime(fmt) if start is not None else None
+        hi = pd.Timestamp(end).strftime(fmt) if end is not None else None
+
+        frames = []
+        for path in self._partitions(kind, resolution):
+            key = self._key(path)
+            if (lo and key < lo) or (hi and key > hi):
+                continue
+            frames.append(read_table(path).assign(time=pd.Timestamp(pd.to_datetime(key, format=fmt))))
+        if not frames:
+            return pd.DataFrame(columns=['time'] + KINDS[kind] + ['aqi_mean', 'no2_mean', 'aqi_max', 'pixels', 'granules'])
+
+        df = pd.concat(frames, ignore_index=True)
+        df['aqi_mean'] = (df['aqi_sum'] / df['pixels']).round(0)
+        df['no2_mean'] = df['no2_sum'] / df['pixels']
+        return df[['time'] + KINDS[kind] + ['aqi_mean', 'no2_mean', 'aqi_max', 'pixels', 'granules']]
@@ -0,0 +1,55 @@
+import os
+import threading
+from collections import OrderedDict
+
+from modules import metrics
+
+# 🧠 Önbellekte tutulacak en fazla türetilmiş görünüm sayısı (LRU)
+MAX_ENTRIES = 64
+
+
+def _source_stamp(path):
+    return os.path.getmtime(path) if path and os.path.exists(path) else None
+
+
+class ViewCache:
+    """
+    Panel rotalarının türetilmiş değerleri için süreç içi LRU önbellek.
+    Veri akışı yeni çıktıları yayımladığında `invalidate()` çağrılır; ayrıca `source_path` verilen
+    girdiler kaynak dosyanın mtime'ı değişince (ör. başka bir süreç güncellediyse) yeniden hesaplanır.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key → (kaynak damgası, değer)
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute, source_path=None):
+        stamp = _source_stamp(source_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc('cache_hits_total', cache='view', key=key)
+                return entry[1]
+            self.misses += 1
+        metrics.inc('cache_misses_total', cache='view', key=key)
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        """Tek bir anahtarı veya (key=None) tüm önbelleği temizler."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# 🗺️ Zon tanımları (GeoJSON FeatureCollection); STORMSENTINEL_ZONES ile başka bir dosya (ör. eyalet/ilçe poligonları) seçilebilir
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ZONES_PATH = os.path.join(BASE_DIR, 'config', 'zones.geojson')
+ZONES_PATH = os.environ.get('STORMSENTINEL_ZONES', DEFAULT_ZONES_PATH)
+
+DEFAULT_OUTSIDE_ZONE = {'name': 'Outside TEMPO Area', 'label_tr': 'TEMPO Alanı Dışı', 'label_en': 'Outside TEMPO Area'}
+ALL_EDGES = ('south', 'north', 'west', 'east')
+
+# Izgara raster'ı en fazla bu kadar hücre olabilir; dağınık (ızgarasız) noktalarda doğrudan değerlendirmeye dönülür
+RASTER_MAX_CELLS = 64_000_000
+RASTER_CELLS_PER_POINT = 8
+
+
+def _zone_dtype(count):
+    for dtype in (np.int8, np.int16, np.int32):
+        if count <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def grid_axis(values):
+    """Değerlerin artan sıralı benzersiz ekseni ve her değerin eksendeki indeksi (hash tabanlı, sıralamasız)."""
+    codes, uniques = pd.factorize(values.ravel())
+    order = np.argsort(uniques)
+    rank = np.empty(len(uniques), dtype=np.int64)
+    rank[order] = np.arange(len(uniques))
+    return uniques[order], rank[codes].reshape(values.shape)
+
+
+def _ring_is_rectangle(ring):
+    lons, lats = ring[:, 0], ring[:, 1]
+    if len(ring) != 5 or not np.array_equal(ring[0], ring[-1]):
+        return False
+    # Eksen hizalı dikdörtgen: her kenar yalnızca bir eksende değişir, 2 farklı enlem ve boylam vardır
+    edges = np.diff(ring, axis=0)
+    return len(np.unique(lons)) == 2 and len(np.unique(lats)) == 2 and bool(np.all((edges == 0).any(axis=1)))
+
+
+def _points_in_rings(lat, lon, rings):
+    """Çift-tek (even-odd) kuralı: tüm halkalar (delikler dahil) kesişim paritesini değiştirir."""
+    inside = np.zeros(np.broadcast(lat, lon).shape, dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            if ay == by:
+                continue
+            crosses = (ay > lat) != (by > lat)
+            x_cross = ax + (lat - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (lon < x_cross)
+    return inside
+
+
+def _rasterize_rings(lat_axis, lon_axis, rings):
+    """
+    `_points_in_rings` ile aynı sonucu ızgara için tarama satırı (scanline) yöntemiyle üretir:
+    her satırda kenar kesişimleri bir kez hesaplanır, sütun paritesi ters kümülatif toplamla bulunur.
+    Maliyet hücre × kenar yerine satır × kenar + hücre kadardır.
+    """
+    edges = np.concatenate([np.stack([ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]], axis=1) for ring in rings])
+    edges = edges[edges[:, 1] != edges[:, 3]]
+    ax, ay, bx, by = (edges[:, k][None, :] for k in range(4))
+    lat = lat_axis[:, None]
+
+    rows, cols = np.nonzero((ay > lat) != (by > lat))
+    x_cross = ax[0, cols] + (lat_axis[rows] - ay[0, cols]) * (bx[0, cols] - ax[0, cols]) / (by[0, cols] - ay[0, cols])
+    # lon < x_cross olan sütunlar [0, p) aralığıdır; p konumundaki kesişim solundaki tüm sütunların paritesini çevirir
+    p = np.searchsorted(lon_axis, x_cross, 'left')
+    width = len(lon_axis) + 1
+    toggles = np.bincount(rows * width + p, minlength=len(lat_axis) * width).reshape(len(lat_axis), width)
+    counts = np.cumsum(toggles[:, ::-1], axis=1)[:, ::-1]
+    return (counts[:, 1:] & 1).astype(bool)
+
+
+class Zone:
+    """Tek bir zon: eksen hizalı dikdörtgen (kenar kapalılığıyla) veya (Multi)Polygon."""
+
+    def __init__(self, name, geometry, label_tr=None, label_en=None, closed_edges=ALL_EDGES):
+        self.name = name
+        self.label_tr = label_tr or name
+        self.label_en = label_en or name
+
+        if geometry['type'] == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            raise ValueError(f"Desteklenmeyen zon geometrisi ({name}): {geometry['type']}")
+        self.polygons = [[np.asarray(ring, dtype=float)[:, :2] for ring in polygon] for polygon in polygons]
+
+        coords = np.concatenate([ring for polygon in self.polygons for ring in polygon])
+        self.west, self.south = coords.min(axis=0)
+        self.east, self.north = coords.max(axis=0)
+
+        self.is_rectangle = len(self.polygons) == 1 and len(self.polygons[0]) == 1 and _ring_is_rectangle(self.polygons[0][0])
+        self.closed = {edge: edge in closed_edges for edge in ALL_EDGES}
+
+    def contains(self, lat, lon):
+        """Vektörel üyelik; lat/lon yayınlanabilir (broadcast) diziler olabilir (ör. (n, 1) × (1, m))."""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        if self.is_rectangle:
+            in_lat = ((lat >= self.south) if self.closed['south'] else (lat > self.south))
+            in_lat &= ((lat <= self.north) if self.closed['north'] else (lat < self.north))
+            in_lon = ((lon >= self.west) if self.closed['west'] else (lon > self.west))
+            in_lon &= ((lon <= self.east) if self.closed['east'] else (lon < self.east))
+            return in_lat & in_lon
+
+        lat, lon = np.broadcast_arrays(lat, lon)
+        inside = np.zeros(lat.shape, dtype=bool)
+        candidates = (lat >= self.south) & (lat <= self.north) & (lon >= self.west) & (lon <= self.east)
+        if candidates.any():
+            plat, plon = lat[candidates], lon[candidates]
+            hit = np.zeros(plat.shape, dtype=bool)
+            for polygon in self.polygons:
+                hit |= _points_in_rings(plat, plon, polygon)
+            inside[candidates] = hit
+        return inside
+
+    def contains_grid(self, lat_axis, lon_axis):
+        """Artan sıralı eksenlerden oluşan ızgarada üyelik maskesi (satır = enlem, sütun = boylam)."""
+        if self.is_rectangle:
+            return self.contains(lat_axis[:, None], lon_axis[None, :])
+        inside = np.zeros((len(lat_axis), len(lon_axis)), dtype=bool)
+        for polygon in self.polygons:
+            inside |= _rasterize_rings(lat_axis, lon_axis, polygon)
+        return inside
+
+    def contains_point(self, lat, lon):
+        """Skaler (saf Python) üyelik; referans ve tekil sorgular için."""
+        if self.is_rectangle:
+            return ((lat >= self.south if self.closed['south'] else lat > self.south)
+                    and (lat <= self.north if self.closed['north'] else lat < self.north)
+                    and (lon >= self.west if self.closed['west'] else lon > self.west)
+                    and (lon <= self.east if self.closed['east'] else lon < self.east))
+        if not (self.south <= lat <= self.north and self.west <= lon <= self.east):
+            return False
+        return any(bool(_points_in_rings(lat, lon, polygon)) for polygon in self.polygons)
+
+
+class ZoneSet:
+    """
+    Sıralı zon listesi (çakışmalarda ilk eşleşen kazanır) ve son kod olarak "alan dışı".
+    Kodlar `names` dizisinin indeksleridir; etiketler tek bu tanımdan okunur.
+    """
+
+    def __init__(self, zones, outside=None):
+        outside = {**DEFAULT_OUTSIDE_ZONE, **(outside or {})}
+        self.zones = list(zones)
+        self.outside = outside['name']
+        self.outside_code = len(self.zones)
+        self.dtype = _zone_dtype(self.outside_code)
+        self.all_rectangles = all(z.is_rectangle for z in self.zones)
+        self.names = np.array([z.name for z in self.zones] + [self.outside], dtype=object)
+        self.fingerprint = self._fingerprint()
+        self._labels = {
+            'tr': {**{z.name: z.label_tr for z in self.zones}, self.outside: outside['label_tr']},
+            'en': {**{z.name: z.label_en for z in self.zones}, self.outside: outside['label_en']},
+        }
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            collection = json.load(f)
+        zones = []
+        for feature in collection.get('features', []):
+            props = feature.get('properties') or {}
+            zones.append(Zone(
+                props['name'], feature['geometry'],
+                label_tr=props.get('label_tr'), label_en=props.get('label_en'),
+                closed_edges=props.get('closed_edges', ALL_EDGES),
+            ))
+        return cls(zones, outside=collection.get('outside_zone'))
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _fingerprint(self):
+        """Zon adları, sırası, kenar kapalılığı ve geometrisinden türetilen özet (ızgara önbelleği anahtarı için)."""
+        h = hashlib.sha256(self.outside.encode('utf-8'))
+        for zone in self.zones:
+            h.update(zone.name.encode('utf-8'))
+            h.update(repr(sorted(e for e, closed in zone.closed.items() if closed)).encode('utf-8'))
+            for polygon in zone.polygons:
+                for ring in polygon:
+                    h.update(np.ascontiguousarray(ring).tobytes())
+        return h.hexdigest()
+
+    def labels(self, lang='tr'):
+        """Zon adı → etiket sözlüğü ('tr' | 'en')."""
+        return dict(self._labels[lang])
+
+    def zone_of(self, lat, lon):
+        for zone in self.zones:
+            if zone.contains_point(lat, lon):
+                return zone.name
+        return self.outside
+
+    def codes(self, lat, lon):
+        """Her nokta için zon kodu (doğrudan vektörel değerlendirme)."""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        codes = np.full(np.broadcast(lat, lon).shape, self.outside_code, dtype=self.dtype)
+        unassigned = np.ones(codes.shape, dtype=bool)
+        for code, zone in enumerate(self.zones):
+            inside = zone.contains(lat, lon) & unassigned
+            codes[inside] = code
+            unassigned &= ~inside
+        return codes
+
+    def raster(self, lat_axis, lon_axis):
+        """
+        Artan sıralı enlem × boylam eksenlerinden oluşan ızgara için zon kodu raster'ı.
+        Her zon yalnızca sınır kutusuna düşen eksen dilimi üzerinde değerlendirilir.
+        """
+        lat_axis = np.asarray(lat_axis, dtype=float)
+        lon_axis = np.asarray(lon_axis, dtype=float)
+        raster = np.full((len(lat_axis), len(lon_axis)), self.outside_code, dtype=self.dtype)
+        unassigned = np.ones(raster.shape, dtype=bool)
+
+        for code, zone in enumerate(self.zones):
+            r0, r1 = np.searchsorted(lat_axis, zone.south, 'left'), np.searchsorted(lat_axis, zone.north, 'right')
+            c0, c1 = np.searchsorted(lon_axis, zone.west, 'left'), np.searchsorted(lon_axis, zone.east, 'right')
+            if r0 >= r1 or c0 >= c1:
+                continue
+            free = unassigned[r0:r1, c0:c1]
+            inside = zone.contains_grid(lat_axis[r0:r1], lon_axis[c0:c1]) & free
+            raster[r0:r1, c0:c1][inside] = code
+            free &= ~inside
+        return raster
+
+    def lookup(self, lat, lon):
+        """
+        Piksel tablosu için zon kodları: benzersiz enlem/boylam değerleri ızgara eksenleri olarak alınır,
+        raster bir kez derlenir ve zonlama tek bir dizi toplama (gather) işlemine iner.
+        Yalnızca dikdörtgen zonlarda (ayrılabilir karşılaştırmalar zaten ucuz) veya noktalar bir ızgaraya
+        oturmuyorsa (raster çok büyükse) doğrudan değerlendirme kullanılır.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        if lat.size == 0 or self.all_rectangles:
+            return self.codes(lat, lon)
+
+        lat_axis, lat_idx = grid_axis(lat)
+        lon_axis, lon_idx = grid_axis(lon)
+        cells = len(lat_axis) * len(lon_axis)
+        if cells > RASTER_MAX_CELLS or cells > RASTER_CELLS_PER_POINT * lat.size:
+            return self.codes(lat, lon)
+        return self.raster(lat_axis, lon_axis)[lat_idx, lon_idx]
+
+
+_zones_lock = threading.Lock()
+_zone_sets = {}
+
+
+def load_zones(path=None):
+    """Zon tanımlarını yükler (yol başına bir kez, süreç içinde paylaşılır)."""
+    path = os.path.abspath(path or ZONES_PATH)
+    with _zones_lock:
+        if path not in _zone_sets:
+            _zone_sets[path] = ZoneSet.from_geojson(path)
+        return _zone_sets[path]
@@ -0,0 +1,53 @@
+"""Vektörel AQI/risk fonksiyonlarının tek değerli (skaler) sürümlerle birebir aynı sonucu verdiği denetimi."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import aqi_calculator as aqi
+
+
+def no2_samples():
+    breakpoints = [0.0, 1.5e16, 2.8e16, 1.0e17, 2.0e17]
+    around = [b + d for b in breakpoints for d in (-1e10, -1.0, 0.0, 1.0, 1e10)]
+    rng = np.random.default_rng(0)
+    return np.concatenate([np.linspace(-1e16, 4e17, 5001), around, rng.uniform(0, 3e17, 5000)])
+
+
+def test_aqi_scores_match_scalar():
+    no2 = no2_samples()
+    expected = np.array([aqi.calculate_aqi_score(v) for v in no2])
+    np.testing.assert_array_equal(aqi.calculate_aqi_scores(no2), expected)
+
+
+@pytest.mark.parametrize('bad', [np.nan, np.inf, -np.inf])
+def test_aqi_scores_reject_non_finite(bad):
+    with pytest.raises(ValueError):
+        aqi.calculate_aqi_scores(np.array([1.0e16, bad]))
+
+
+def test_risk_levels_match_scalar():
+    scores = np.concatenate([np.arange(-5, 400), [50, 50.5, 100, 100.5, 150, 150.5]])
+    expected = np.array([aqi.risk_level(s) for s in scores], dtype=object)
+    np.testing.assert_array_equal(aqi.risk_levels(scores), expected)
+
+
+def test_compute_aqi_frame_matches_row_wise():
+    rng = np.random.default_rng(1)
+    n = 4000
+    df = pd.DataFrame({'latitude': rng.uniform(5, 60, n), 'longitude': rng.uniform(-135, -35, n),
+                       'no2': rng.uniform(0, 3e17, n)})
+    result = aqi.compute_aqi_frame(df)
+
+    # 🐢 Özgün satır satır (apply) akış
+    expected = df.rename(columns={'no2': 'NO2_column'})
+    expected['aqi'] = expected['NO2_column'].apply(aqi.calculate_aqi_score)
+    expected['zone'] = expected.apply(lambda row: aqi.define_us_region(row['latitude'], row['longitude']), axis=1)
+    expected = expected[expected['zone'] != 'Outside TEMPO Area'].reset_index(drop=True)
+    expected['risk_score'] = expected.groupby('zone')['aqi'].transform('mean').round(0)
+    expected['risk_level'] = expected['risk_score'].apply(aqi.risk_level)
+
+    assert len(result) == len(expected) > 0
+    for column in ('latitude', 'longitude', 'NO2_column', 'aqi', 'risk_score'):
+        np.testing.assert_array_equal(result[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float))
+    for column in ('zone', 'risk_level'):
+        np.testing.assert_array_equal(result[column].astype(str).to_numpy(), expected[column].astype(str).to_numpy())
@@ -0,0 +1,33 @@
+"""Granül indiricinin kesilen aktarımı sürdürmesi ve indirme süresi ölçümü."""
+import asyncio
+import os
+import sys
+
+from modules import granule_fetcher
+from modules.granule_fetcher import GranuleCache, GranuleFetcher, file_sha256
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from granule_server import serve_in_thread  # noqa: E402
+
+
+def test_download_seconds_span_all_retries(tmp_path, monkeypatch):
+    src = tmp_path / 'src'
+    src.mkdir()
+    granule = src / 'TEMPO_NO2_L3_V03_20240501T120000Z_S001.nc'
+    granule.write_bytes(os.urandom(1 << 20))
+    observed = []
+    monkeypatch.setattr(granule_fetcher, 'RETRY_BACKOFF', 0.3)
+    monkeypatch.setattr(granule_fetcher.metrics, 'observe', lambda name, value, **labels: observed.append(value))
+
+    server, _ = serve_in_thread(str(src), truncate_after=1 << 18)
+    fetcher = GranuleFetcher(GranuleCache(str(tmp_path / 'cache')), concurrency=1)
+    try:
+        path = asyncio.run(fetcher.fetch(f'{server.url}/{granule.name}'))
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+    assert os.path.basename(path) == file_sha256(str(granule))
+    assert server.stats['range_requests'] == 1
+    # Kesilen ilk deneme ve yeniden deneme beklemesi de süreye dahil
+    assert len(observed) == 1 and observed[0] >= 0.3
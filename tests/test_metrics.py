@@ -0,0 +1,29 @@
+"""Çok işçili sunucuda /metrics: süreçlerin ölçüm dosyaları toplanır."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+from modules import metrics
+metrics.inc('jobs_total', 3, state='done')
+metrics.observe('http_request_seconds', 0.02, route='/aqi_panel')
+"""
+
+
+def _env(metrics_dir):
+    return dict(os.environ, STORMSENTINEL_METRICS='1', STORMSENTINEL_METRICS_DIR=str(metrics_dir))
+
+
+def test_render_sums_all_worker_processes(tmp_path):
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', WORKER], cwd=ROOT, env=_env(tmp_path), check=True)
+    assert len(list(tmp_path.glob('*.json'))) == 2
+
+    render = "from modules import metrics\nmetrics.inc('jobs_total', 1, state='done')\nprint(metrics.render())"
+    out = subprocess.run([sys.executable, '-c', render], cwd=ROOT, env=_env(tmp_path), check=True,
+                         capture_output=True, text=True).stdout
+    assert 'stormsentinel_jobs_total{state="done"} 7' in out
+    assert 'stormsentinel_http_request_seconds_count{route="/aqi_panel"} 2' in out
+    assert 'stormsentinel_http_request_seconds_bucket{route="/aqi_panel",le="0.025"} 2' in out
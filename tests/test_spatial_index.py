@@ -0,0 +1,51 @@
+"""PixelIndex.bbox_stats hücre özetli yolunun, tüm pikselleri tarayan np.percentile sonucuyla aynı olduğu denetimi."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import spatial_index
+from modules.spatial_index import PixelIndex, STAT_PERCENTILES
+
+BBOXES = [(-180, -90, 180, 90), (-100, 30, -80, 40), (-119.9, 20.1, -70.1, 49.9), (-130, 45, -110, 60),
+          (-90, 35, -89.9, 35.1), (-200, -90, -150, 0)]
+
+
+def make_frame(aqi, no2, n=100000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'latitude': rng.uniform(20, 50, n), 'longitude': rng.uniform(-120, -70, n),
+                         'NO2_column': no2(rng, n), 'aqi': aqi(rng, n)})
+
+
+FRAMES = {
+    # AQI hücre içinde NO2 ile birlikte sıralı değil: ayrı sıralı kopya yolu
+    'bağımsız': make_frame(lambda rng, n: rng.integers(0, 300, n), lambda rng, n: rng.normal(1e16, 3e15, n)),
+    'sabit': make_frame(lambda rng, n: np.full(n, 66), lambda rng, n: np.full(n, 2e16)),
+}
+
+
+@pytest.fixture(autouse=True)
+def aggregate_path(monkeypatch):
+    monkeypatch.setattr(spatial_index, 'RAW_SCAN_LIMIT', 0)
+
+
+@pytest.mark.parametrize('frame', FRAMES)
+def test_bbox_stats_match_raw_scan(frame):
+    index = PixelIndex(FRAMES[frame])
+    for bbox in BBOXES:
+        stats, idx = index.bbox_stats(*bbox), index.bbox(*bbox)
+        assert stats['count'] == len(idx)
+        for name, values in (('aqi', index.aqi[idx]), ('NO2_column', index.no2[idx])):
+            if len(idx) == 0:
+                assert name not in stats
+                continue
+            expected = dict(zip((f'p{p}' for p in STAT_PERCENTILES), np.percentile(values, STAT_PERCENTILES)))
+            assert stats[name]['max'] == values.max()
+            assert stats[name]['mean'] == pytest.approx(values.mean(), rel=1e-12)
+            for key, value in expected.items():
+                assert stats[name][key] == pytest.approx(value, rel=1e-12), (bbox, name, key)
+
+
+def test_extreme_coordinates_do_not_overflow():
+    index = PixelIndex(FRAMES['sabit'])
+    assert index.nearest(1e308, 1) is None
+    assert index.bbox_stats(-1e308, -1e308, 1e308, 1e308)['count'] == len(index)
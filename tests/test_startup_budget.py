@@ -0,0 +1,21 @@
+"""Web sunucusu içe aktarma bütçesi: benchmarks/bench_startup.py ile aynı ölçüm, CI'da test olarak."""
+import os
+import statistics
+
+from benchmarks.bench_startup import HEAVY_MODULES, probe
+
+# ⏱️ Medyan `import app` süresi üst sınırı (ms); yavaş CI makineleri için ortam değişkeniyle büyütülebilir
+IMPORT_BUDGET_MS = float(os.environ.get('STORMSENTINEL_IMPORT_BUDGET_MS', 750))
+REPEAT = 3
+
+
+def test_import_app_within_budget():
+    runs = [probe() for _ in range(REPEAT)]
+    median = statistics.median(r['import_ms'] for r in runs)
+    assert median <= IMPORT_BUDGET_MS, f"import app medyanı {median:.0f} ms > {IMPORT_BUDGET_MS:.0f} ms"
+
+
+def test_template_routes_skip_heavy_modules():
+    run = probe()
+    assert all(status == 200 for status in run['status'].values()), run['status']
+    assert run['loaded_after_light'] == [], f"ağır modüller yüklendi: {run['loaded_after_light']} / {HEAVY_MODULES}"
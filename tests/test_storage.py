@@ -0,0 +1,42 @@
+"""Klasör tabloların (.npyd) sürümlü klasör + sembolik bağlantı ile yayımlanması."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from modules import storage
+
+
+def frame(value, n=10):
+    return pd.DataFrame({'a': np.full(n, value), 'zone': ['x'] * n})
+
+
+def versions(folder):
+    return sorted(e for e in os.listdir(folder) if e.startswith('.t.npyd.v'))
+
+
+def test_npyd_publish_swaps_a_link(tmp_path, monkeypatch):
+    path = str(tmp_path / 't.npyd')
+    os.makedirs(path)  # eski düzen: gerçek klasör bağlantıya dönüşür
+    storage.write_table(frame(1), path)
+    assert os.path.islink(path)
+    monkeypatch.setattr(storage, 'NPY_VERSION_GRACE_SECONDS', 0)
+    for value in (2, 3, 4):
+        storage.write_table(frame(value), path)
+        assert (storage.read_table(path)['a'] == value).all()
+    # Geçerli ve önceki sürüm kalır, geçici dosya kalmaz
+    assert len(versions(tmp_path)) == 2
+    assert sorted(os.listdir(tmp_path)) == versions(tmp_path) + ['t.npyd']
+
+
+def test_npyd_publish_without_symlinks(tmp_path, monkeypatch):
+    def no_symlink(*args, **kwargs):
+        raise OSError("symlink yok")
+
+    monkeypatch.setattr(os, 'symlink', no_symlink)
+    path = str(tmp_path / 't.npyd')
+    for value in (1, 2):
+        storage.write_table(frame(value), path)
+        assert not os.path.islink(path)
+        assert (storage.read_table(path)['a'] == value).all()
+    assert os.listdir(tmp_path) == ['t.npyd']
@@ -0,0 +1,25 @@
+"""ROI okuması: blokların chunk sınırlarına hizalanması ve ROI geometrisinin tam ızgaradan kesilmesi."""
+from modules.tempo_reader import _block_ranges
+
+
+def test_blocks_align_to_absolute_chunk_boundaries():
+    assert list(_block_ranges(483, 924, 256)) == [(483, 512), (512, 768), (768, 924)]
+    assert list(_block_ranges(0, 600, 256)) == [(0, 256), (256, 512), (512, 600)]
+    assert list(_block_ranges(709, 740, 256)) == [(709, 740)]
+    assert list(_block_ranges(5, 5, 256)) == []
+
+
+def test_region_geometry_is_sliced_from_full_grid(tmp_path):
+    import numpy as np
+
+    from modules.grid_cache import GridGeometry, load_region_geometry
+    from modules.zones import load_zones
+
+    lat, lon = np.linspace(14, 58, 400), np.linspace(-135, -38, 700)
+    lat_sl, lon_sl = slice(123, 311), slice(57, 602)
+    region = load_region_geometry(lat, lon, lat_sl, lon_sl, cache_dir=str(tmp_path))
+    direct = GridGeometry.build(lat[lat_sl], lon[lon_sl], load_zones())
+    for name in ('lat', 'lon', 'zone', 'cells'):
+        np.testing.assert_array_equal(getattr(region, name), getattr(direct, name))
+    # Yalnızca tam ızgara diske yazılır
+    assert len(list(tmp_path.iterdir())) == 1
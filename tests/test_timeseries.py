@@ -0,0 +1,44 @@
+"""Zaman serisi bölümleri: tablo biçimi değişince bir dönem iki kez sayılmamalı."""
+import os
+
+import pandas as pd
+
+from modules import storage
+from modules.timeseries import TimeSeriesStore
+
+
+def aggregates(pixels):
+    zones = pd.DataFrame({'zone': ['Northeast'], 'aqi_sum': [50.0 * pixels], 'no2_sum': [1e16 * pixels],
+                          'pixels': [pixels], 'aqi_max': [80]})
+    cells = pd.DataFrame({'row': [84], 'col': [-150], 'aqi_sum': [50.0 * pixels], 'no2_sum': [1e16 * pixels],
+                          'pixels': [pixels], 'aqi_max': [80]})
+    return {'zones': zones, 'cells': cells}
+
+
+def test_format_switch_does_not_double_count(tmp_path, monkeypatch):
+    store = TimeSeriesStore(str(tmp_path))
+    store.append('20240501T120000Z', aggregates(10))
+
+    monkeypatch.setattr(storage, 'TABLE_FORMAT', 'npy')
+    store.append('20240501T120000Z', aggregates(10))  # aynı granül yeniden işlendi
+    store.append('20240501T123000Z', aggregates(5))
+
+    for resolution in ('raw', 'hourly', 'daily'):
+        assert all(name.endswith('.npyd') for name in os.listdir(tmp_path / 'zones' / resolution)
+                   if not name.startswith('.'))
+    for resolution, granules in (('hourly', 2), ('daily', 2)):
+        df = store.query('zones', resolution=resolution)
+        assert len(df) == 1
+        assert df['pixels'].iloc[0] == 15 and df['granules'].iloc[0] == granules
+    assert store.query('cells', resolution='raw')['pixels'].tolist() == [10, 5]
+
+
+def test_query_reads_latest_partition_per_period(tmp_path):
+    # Eski düzen: aynı saat için iki biçimde bölüm kalmış; en son yazılan geçerlidir
+    store = TimeSeriesStore(str(tmp_path))
+    store.append('20240501T120000Z', aggregates(10))
+    stale = str(tmp_path / 'zones' / 'hourly' / '20240501T12.csv')
+    storage.write_table(storage.read_table(stale).assign(pixels=999), storage.table_path(stale, 'npy'))
+    os.utime(stale, (0, 0))
+    df = store.query('zones', resolution='hourly')
+    assert len(df) == 1 and df['pixels'].iloc[0] == 999
@@ -0,0 +1,68 @@
+"""GeoJSON zon tanımlarının özgün if/elif zonlamasıyla ve raster/lookup yollarının doğrudan değerlendirmeyle aynılığı."""
+import numpy as np
+
+from modules import aqi_calculator as aqi
+from modules.zones import Zone, ZoneSet, load_zones
+
+
+# 📍 Özgün if/elif zonlama zinciri (config/zones.geojson bununla aynı sonucu vermeli)
+def legacy_region(lat, lon):
+    if 45 <= lat <= 55 and -130 <= lon <= -100:
+        return 'Northwest'
+    elif 40 <= lat <= 50 and -100 < lon <= -70:
+        return 'North Central'
+    elif 40 <= lat <= 50 and -70 < lon <= -40:
+        return 'Northeast'
+    elif 30 <= lat < 45 and -120 <= lon <= -100:
+        return 'Southwest'
+    elif 10 <= lat < 40 and -100 < lon <= -70:
+        return 'South Central'
+    elif 25 <= lat < 40 and -70 < lon <= -40:
+        return 'Southeast'
+    else:
+        return 'Outside TEMPO Area'
+
+
+def boundary_axes():
+    # Zon sınırları tam sayı derecelerde; sınırın üstü ve iki yanı birlikte taranır
+    lats = np.unique(np.concatenate([np.arange(5, 61, 1.0), np.arange(5, 61, 1.0) + 0.5,
+                                     np.arange(5, 61, 1.0) - 1e-9]))
+    lons = np.unique(np.concatenate([np.arange(-135, -34, 1.0), np.arange(-135, -34, 1.0) + 0.5,
+                                     np.arange(-135, -34, 1.0) + 1e-9]))
+    return lats, lons
+
+
+def boundary_grid():
+    lat, lon = np.meshgrid(*boundary_axes(), indexing='ij')
+    return lat.ravel(), lon.ravel()
+
+
+def test_region_codes_match_scalar_and_legacy():
+    lat, lon = boundary_grid()
+    vectorized = aqi.define_us_regions(lat, lon)
+    scalar = np.array([aqi.define_us_region(a, o) for a, o in zip(lat, lon)], dtype=object)
+    legacy = np.array([legacy_region(a, o) for a, o in zip(lat, lon)], dtype=object)
+    np.testing.assert_array_equal(scalar, legacy)
+    np.testing.assert_array_equal(vectorized, legacy)
+
+
+def test_raster_matches_direct_codes():
+    zones = load_zones()
+    lats, lons = boundary_axes()
+    lat, lon = boundary_grid()
+    np.testing.assert_array_equal(zones.raster(lats, lons).ravel(), zones.codes(lat, lon))
+
+
+def test_polygon_lookup_matches_direct_codes():
+    # Dikdörtgen olmayan zon: lookup raster yolunu kullanır
+    triangle = {'type': 'Polygon', 'coordinates': [[[-120, 30], [-80, 30], [-100, 50], [-120, 30]]]}
+    box = {'type': 'Polygon', 'coordinates': [[[-110, 20], [-60, 20], [-60, 45], [-110, 45], [-110, 20]]]}
+    zones = ZoneSet([Zone('tri', triangle), Zone('box', box)])
+    assert not zones.all_rectangles
+    lat, lon = boundary_grid()
+    codes = zones.codes(lat, lon)
+    assert set(np.unique(codes)) == {0, 1, zones.outside_code}
+    np.testing.assert_array_equal(zones.lookup(lat, lon), codes)
+    sample = slice(None, None, 97)
+    np.testing.assert_array_equal(zones.names[codes[sample]],
+                                  [zones.zone_of(a, o) for a, o in zip(lat[sample], lon[sample])])